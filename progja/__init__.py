@@ -1,4 +1,5 @@
-from . import data, entities, kanji, words, sentences, paths, decks
+from . import components, data, entities, kanji, words, sentences, paths
+from . import anki, decks, templates, unlocks
 from . import logging, tokenizer
 
 VERSION = '0.1.2'
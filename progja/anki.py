@@ -0,0 +1,289 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import zipfile
+
+
+logger = logging.getLogger(__name__)
+
+note_type_name = 'Progressive Japanese Note'
+note_type_fields = ('ID', 'Front', 'Back')
+deck_name_pattern = 'Progressive Japanese (Lv. {level})'
+
+# the legacy (schema 11) collection format, which every Anki version can import
+schema = '''
+CREATE TABLE col (
+    id integer PRIMARY KEY, crt integer NOT NULL, mod integer NOT NULL,
+    scm integer NOT NULL, ver integer NOT NULL, dty integer NOT NULL,
+    usn integer NOT NULL, ls integer NOT NULL, conf text NOT NULL,
+    models text NOT NULL, decks text NOT NULL, dconf text NOT NULL,
+    tags text NOT NULL
+);
+CREATE TABLE notes (
+    id integer PRIMARY KEY, guid text NOT NULL, mid integer NOT NULL,
+    mod integer NOT NULL, usn integer NOT NULL, tags text NOT NULL,
+    flds text NOT NULL, sfld integer NOT NULL, csum integer NOT NULL,
+    flags integer NOT NULL, data text NOT NULL
+);
+CREATE TABLE cards (
+    id integer PRIMARY KEY, nid integer NOT NULL, did integer NOT NULL,
+    ord integer NOT NULL, mod integer NOT NULL, usn integer NOT NULL,
+    type integer NOT NULL, queue integer NOT NULL, due integer NOT NULL,
+    ivl integer NOT NULL, factor integer NOT NULL, reps integer NOT NULL,
+    lapses integer NOT NULL, left integer NOT NULL, odue integer NOT NULL,
+    odid integer NOT NULL, flags integer NOT NULL, data text NOT NULL
+);
+CREATE TABLE revlog (
+    id integer PRIMARY KEY, cid integer NOT NULL, usn integer NOT NULL,
+    ease integer NOT NULL, ivl integer NOT NULL, lastIvl integer NOT NULL,
+    factor integer NOT NULL, time integer NOT NULL, type integer NOT NULL
+);
+CREATE TABLE graves (
+    usn integer NOT NULL, oid integer NOT NULL, type integer NOT NULL
+);
+CREATE INDEX ix_notes_usn ON notes (usn);
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_revlog_usn ON revlog (usn);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE INDEX ix_notes_csum ON notes (csum);
+'''
+
+deck_options = {
+    'id': 1,
+    'name': 'Default',
+    'mod': 0,
+    'usn': 0,
+    'maxTaken': 60,
+    'autoplay': True,
+    'timer': 0,
+    'replayq': True,
+    'new': {
+        'bury': True,
+        'delays': [1, 10],
+        'initialFactor': 2500,
+        'ints': [1, 4, 7],
+        'order': 1,
+        'perDay': 20,
+        'separate': True
+    },
+    'lapse': {
+        'delays': [10],
+        'leechAction': 0,
+        'leechFails': 8,
+        'minInt': 1,
+        'mult': 0
+    },
+    'rev': {
+        'bury': True,
+        'ease4': 1.3,
+        'fuzz': 0.05,
+        'ivlFct': 1,
+        'maxIvl': 36500,
+        'minSpace': 1,
+        'perDay': 100
+    }
+}
+
+html_tag_pattern = re.compile('<[^>]*>')
+base91_table = (
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    '!#$%&()*+,-./:;<=>?@[]^_`{|}~'
+)
+
+
+def write_package(cards, path, deck_name, css=''):
+    """
+    Writes cards (dicts with ID, Front, Back and Tags) to an Anki package.
+    Notes have stable GUIDs derived from the card IDs, so importing a new
+    version of a package updates the existing notes.
+    """
+    logger.info('writing package {} ...'.format(path))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        collection_path = os.path.join(temp_dir, 'collection.anki2')
+        connection = sqlite3.connect(collection_path)
+        try:
+            count = write_collection(connection, cards, deck_name, css)
+        finally:
+            connection.close()
+        temp_path = '{}.tmp'.format(path)
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as file:
+            file.write(collection_path, 'collection.anki2')
+            file.writestr('media', '{}')
+        os.replace(temp_path, path)
+    logger.info('wrote {} notes to package {}'.format(count, path))
+    return count
+
+
+def write_collection(connection, cards, deck_name, css=''):
+    now = int(time.time())
+    deck_id = create_id(deck_name)
+    note_type_id = create_id(note_type_name)
+    connection.executescript(schema)
+    with connection:
+        connection.execute(
+            'INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, ?)',
+            (
+                now,
+                now * 1000,
+                now * 1000,
+                json.dumps(create_config(deck_id, note_type_id)),
+                json.dumps(create_note_types(note_type_id, deck_id, css, now)),
+                json.dumps(create_decks(deck_id, deck_name, now)),
+                json.dumps({'1': deck_options}),
+                json.dumps({})
+            )
+        )
+        # duplicate cards keep the position of the first card and the
+        # contents of the last one
+        note_ids = []
+
+        def create_notes():
+            for card in cards:
+                note = create_note(card, note_type_id, now)
+                note_ids.append(note[0])
+                yield note
+
+        connection.executemany(
+            'INSERT INTO notes VALUES (?, ?, ?, ?, -1, ?, ?, ?, ?, 0, \'\') '
+            'ON CONFLICT (id) DO UPDATE SET '
+            'tags = excluded.tags, flds = excluded.flds, '
+            'sfld = excluded.sfld, csum = excluded.csum',
+            create_notes()
+        )
+        note_ids = list(dict.fromkeys(note_ids))
+        connection.executemany(
+            'INSERT INTO cards VALUES '
+            '(?, ?, ?, 0, ?, -1, 0, 0, ?, 0, 0, 0, 0, 0, 0, 0, 0, \'\')',
+            (
+                (note_id, note_id, deck_id, now, position)
+                for position, note_id in enumerate(note_ids)
+            )
+        )
+    connection.execute('VACUUM')
+    return len(note_ids)
+
+
+def create_note(card, note_type_id, now):
+    fields = [card[field] for field in note_type_fields]
+    sort_field = html_tag_pattern.sub('', fields[0])
+    checksum = int(hashlib.sha1(sort_field.encode('utf-8')).hexdigest()[:8], 16)
+    tags = ' {} '.format(card['Tags']) if card['Tags'] else ''
+    return (
+        create_id(card['ID']),
+        create_guid(card['ID']),
+        note_type_id,
+        now,
+        tags,
+        '\x1f'.join(fields),
+        sort_field,
+        checksum
+    )
+
+
+def create_id(value):
+    # a positive integer that is safe to use in JavaScript
+    return int(hashlib.sha256(value.encode('utf-8')).hexdigest()[:13], 16)
+
+
+def create_guid(value):
+    digest = hashlib.sha256(value.encode('utf-8')).hexdigest()
+    number = int(digest[13:29], 16)
+    characters = []
+    while number:
+        number, remainder = divmod(number, len(base91_table))
+        characters.append(base91_table[remainder])
+    return ''.join(reversed(characters)) or base91_table[0]
+
+
+def create_config(deck_id, note_type_id):
+    return {
+        'activeDecks': [deck_id],
+        'curDeck': deck_id,
+        'curModel': str(note_type_id),
+        'newSpread': 0,
+        'collapseTime': 1200,
+        'timeLim': 0,
+        'estTimes': True,
+        'dueCounts': True,
+        'sortType': 'noteFld',
+        'sortBackwards': False,
+        'nextPos': 1,
+        'addToCur': True
+    }
+
+
+def create_note_types(note_type_id, deck_id, css, now):
+    return {
+        str(note_type_id): {
+            'id': note_type_id,
+            'name': note_type_name,
+            'type': 0,
+            'mod': now,
+            'usn': -1,
+            'sortf': 0,
+            'did': deck_id,
+            'tags': [],
+            'vers': [],
+            'css': css,
+            'latexPre': (
+                '\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}'
+                '\n\\usepackage[utf8]{inputenc}\n\\usepackage{amssymb,amsmath}'
+                '\n\\pagestyle{empty}\n\\setlength{\\parindent}{0in}'
+                '\n\\begin{document}\n'
+            ),
+            'latexPost': '\\end{document}',
+            'flds': [
+                {
+                    'name': name,
+                    'ord': i,
+                    'font': 'Arial',
+                    'size': 20,
+                    'media': [],
+                    'rtl': False,
+                    'sticky': False
+                }
+                for i, name in enumerate(note_type_fields)
+            ],
+            'tmpls': [
+                {
+                    'name': 'Card 1',
+                    'ord': 0,
+                    'qfmt': '{{Front}}',
+                    'afmt': '{{FrontSide}}\n\n<hr id=answer>\n\n{{Back}}',
+                    'bqfmt': '',
+                    'bafmt': '',
+                    'did': None
+                }
+            ],
+            'req': [[0, 'any', [1]]]
+        }
+    }
+
+
+def create_decks(deck_id, deck_name, now):
+    decks = {}
+    for did, name in ((1, 'Default'), (deck_id, deck_name)):
+        decks[str(did)] = {
+            'id': did,
+            'name': name,
+            'desc': '',
+            'mod': now,
+            'usn': -1,
+            'conf': 1,
+            'dyn': 0,
+            'collapsed': False,
+            'extendNew': 10,
+            'extendRev': 50,
+            'newToday': [0, 0],
+            'revToday': [0, 0],
+            'lrnToday': [0, 0],
+            'timeToday': [0, 0]
+        }
+    return decks
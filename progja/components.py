@@ -0,0 +1,114 @@
+from array import array
+from collections.abc import Mapping
+
+
+# every (text, type) component is interned to a small integer ID
+registry = {}
+table = []
+
+
+def intern(component):
+    component_id = registry.get(component)
+    if component_id is None:
+        component = tuple(component)
+        component_id = registry.setdefault(component, len(table))
+        if component_id == len(table):
+            table.append(component)
+    return component_id
+
+
+def lookup(component_id):
+    return table[component_id]
+
+
+def encode(components):
+    return array('I', map(intern, components))
+
+
+def decode(ids):
+    return [table[component_id] for component_id in ids]
+
+
+class ComponentLists(Mapping):
+    """
+    A read-only mapping of keys to lists of components (e.g. compositions or
+    progressions), stored as one flat array of interned component IDs.
+    """
+
+    def __init__(self, items=()):
+        if isinstance(items, Mapping):
+            items = items.items()
+        self.index = {}
+        self.offsets = array('I', [0])
+        self.ids = array('I')
+        # maps stored IDs to interned IDs when they were read from elsewhere
+        self.remap = None
+        for key, components in items:
+            self.index[key] = len(self.offsets) - 1
+            self.ids.extend(map(intern, components))
+            self.offsets.append(len(self.ids))
+
+    def __getitem__(self, key):
+        return decode(self.ids_of(key))
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def ids_of(self, key):
+        i = self.index[key]
+        ids = self.ids[self.offsets[i]:self.offsets[i + 1]]
+        if self.remap is not None:
+            return [self.remap[component_id] for component_id in ids]
+        return ids
+
+    def count(self):
+        counts = {}
+        for component_id in self.ids:
+            counts[component_id] = counts.get(component_id, 0) + 1
+        counts = sorted(counts.items(), key=lambda c: -1 * c[1])
+        remap = self.remap or range(len(table))
+        return {table[remap[component_id]]: n for component_id, n in counts}
+
+    def __reduce__(self):
+        # IDs are only valid within a process, so the table is pickled too
+        return (restore, pack(self))
+
+
+def pack(lists):
+    """
+    Returns the keys, offsets, IDs, and component table of the given lists,
+    with IDs renumbered to index the returned table.
+    """
+    local = {}
+    local_table = []
+    offsets = array('I', [0])
+    ids = array('I')
+    for key in lists:
+        for component_id in lists.ids_of(key):
+            if component_id not in local:
+                local[component_id] = len(local_table)
+                local_table.append(table[component_id])
+            ids.append(local[component_id])
+        offsets.append(len(ids))
+    return list(lists), offsets, ids, local_table
+
+
+def restore(keys, offsets, ids, packed_table):
+    """
+    Returns lists from the output of pack(). offsets and ids may be any
+    sequence of integers (e.g. a memoryview), and are not copied.
+    """
+    lists = ComponentLists()
+    lists.index = {key: i for i, key in enumerate(keys)}
+    lists.offsets = offsets
+    lists.ids = ids
+    remap = encode(packed_table)
+    if remap != array('I', range(len(packed_table))):
+        lists.remap = remap
+    return lists
@@ -1,13 +1,30 @@
+import gzip
 import json
 import logging
+import mmap
 import os
+import pickle
+import sys
+from array import array
+from collections.abc import Mapping
+from functools import wraps
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+from . import components
 
 
 logger = logging.getLogger(__name__)
 
 package_dir = os.path.realpath(os.path.dirname(__file__))
 data_dir = os.path.join(package_dir, 'data')
+snapshots_dir = os.path.join(data_dir, 'snapshots')
+
+snapshot_version = 4
+use_snapshots = os.getenv('PROGJA_SNAPSHOTS', '1') != '0'
+snapshot_loaders = {}
+
+json_chunk_size = 64 * 1024
 
 
 def text_reader(build_path):
@@ -19,38 +36,386 @@ def text_reader(build_path):
 
 
 def csv_reader(build_path):
-    def read(*path, dtypes=None):
-        return pd.read_csv(build_path(*path), dtype=dtypes)
+    def read(*path, dtypes=None, columns=None):
+        return pd.read_csv(build_path(*path), dtype=dtypes, usecols=columns)
     return read
 
 
+def compression_of(path):
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def open_file(path, mode='r', compression=None):
+    """
+    Opens a text file, compressed with gzip or zstd if the path ends with
+    `.gz` or `.zst` (or if a compression is given). zstd requires the optional
+    `zstandard` package.
+    """
+    compression = compression or compression_of(path)
+    if compression == 'gzip':
+        return gzip.open(path, '{}t'.format(mode), encoding='utf-8')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError(
+                'the zstandard package is required for {}'.format(path))
+        return zstandard.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def is_json_lines(path):
+    path = path[:-len('.gz')] if path.endswith('.gz') else path
+    path = path[:-len('.zst')] if path.endswith('.zst') else path
+    return path.endswith('.jsonl')
+
+
 def jsonl_writer(build_path):
+    """
+    Returns a function that writes an iterable of rows, one row per line.
+    `.jsonl` files are written as newline-delimited JSON, and any other file as
+    a JSON array (so it can still be read with `json.load`).
+    """
     def write(data, *path, **kwargs):
-        if type(data) is not list:
-            raise ValueError('data must be a list')
+        # (strings, bytes and mappings are iterable, but not of rows)
+        if isinstance(data, (str, bytes, bytearray, Mapping)):
+            raise ValueError('data must be an iterable of rows')
         indent = max(1, kwargs.pop('indent', 2))
         kwargs['ensure_ascii'] = kwargs.get('ensure_ascii', False)
-        with open(build_path(*path), 'w') as file:
-            file.write('[\n')
-            for i, row in enumerate(data):
+        path = build_path(*path)
+        lines = is_json_lines(path)
+        temp_path = '{}.tmp'.format(path)
+        with open_file(temp_path, 'w', compression_of(path)) as file:
+            if not lines:
+                file.write('[\n')
+            empty = True
+            for row in data:
+                if lines:
+                    file.write(json.dumps(row, **kwargs))
+                    file.write('\n')
+                    continue
                 file.write(''.join([
+                    '' if empty else ',\n',
                     ' ' * indent,
-                    json.dumps(row, **kwargs),
-                    ',' if i < len(data) - 1 else '',
-                    '\n'
+                    json.dumps(row, **kwargs)
                 ]))
-            file.write(']\n')
+                empty = False
+            if not lines:
+                file.write(']\n' if empty else '\n]\n')
+        os.replace(temp_path, path)
     return write
 
 
+def jsonl_reader(build_path):
+    """
+    Returns a function that lazily yields the rows of a newline-delimited JSON
+    file or of a JSON array, without loading the whole file into memory.
+    """
+    def read(*path, **kwargs):
+        decoder = json.JSONDecoder(**kwargs)
+        path = build_path(*path)
+        with open_file(path) as file:
+            if is_json_lines(path):
+                for line in file:
+                    if line.strip():
+                        yield decoder.decode(line)
+            else:
+                yield from iterate_json_array(file, decoder)
+    return read
+
+
+# the state that follows each expected token of a JSON array (values are
+# expected in the "first" and "value" states)
+json_array_transitions = {
+    ('open', '['): 'first',
+    ('first', ']'): 'closed',
+    ('next', ','): 'value',
+    ('next', ']'): 'closed'
+}
+
+
+def iterate_json_array(file, decoder):
+    buffer = ''
+    position = 0
+    end_of_file = False
+    state = 'open'
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n':
+            position += 1
+        if position < len(buffer):
+            character = buffer[position]
+            if (state, character) in json_array_transitions:
+                state = json_array_transitions[state, character]
+                position += 1
+                continue
+            if state not in ('first', 'value'):
+                raise json.JSONDecodeError(
+                    'Unexpected character in array', buffer, position)
+            try:
+                row, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if end_of_file:
+                    raise
+                end = None
+            # a value at the end of the buffer may be incomplete
+            if end and (end < len(buffer) or end_of_file):
+                position = end
+                state = 'next'
+                yield row
+                continue
+        elif end_of_file:
+            if state != 'closed':
+                raise json.JSONDecodeError(
+                    'Unterminated array', buffer, position)
+            return
+        chunk = file.read(json_chunk_size)
+        end_of_file = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
 def json_reader(build_path):
     def read(*path, **kwargs):
-        with open(build_path(*path)) as file:
+        with open_file(build_path(*path)) as file:
             data = json.load(file, **kwargs)
         return data
     return read
 
 
+def index_rows(df, *columns):
+    keys = columns[0] if len(columns) == 1 else list(columns)
+    return df.groupby(keys, sort=False).indices
+
+
+def select_rows(df, positions):
+    return df.iloc[positions if positions is not None else []]
+
+
+def merge_sorted(frames, by):
+    """
+    Concatenates frames that are sorted by some columns into one frame sorted
+    by them (with a new index), like a stable sort of the concatenation. The
+    frames must already be sorted: their rows are merged with a stable sort
+    of the concatenated keys, which only has to merge the sorted runs. The
+    frame is built a column at a time, so the full concatenation is never
+    held in memory.
+    """
+    positions = merge_positions(frames, by)
+    columns = {}
+    for column in frames[0].columns:
+        values = concat_columns([df[column] for df in frames])
+        columns[column] = values.take(positions).reset_index(drop=True)
+    return pd.DataFrame(columns, copy=False)
+
+
+def concat_columns(columns):
+    dtypes = [c.dtype for c in columns]
+    if all(dtype == dtypes[0] for dtype in dtypes):
+        return pd.concat(columns, ignore_index=True)
+    # concatenating categoricals with different categories creates strings,
+    # so their categories are combined instead (like converting the strings
+    # back to categoricals)
+    if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+        if len({dtype.categories.dtype for dtype in dtypes}) == 1:
+            return pd.Series(
+                union_categoricals(columns, sort_categories=True)
+                .remove_unused_categories())
+        return pd.concat(columns, ignore_index=True).astype('category')
+    return pd.concat(columns, ignore_index=True)
+
+
+def merge_positions(frames, by):
+    # the keys are compared as records (strings as fixed-width unicode), and
+    # the sort is stable, so equal rows keep the order of the frames
+    keys = np.rec.fromarrays([
+        merge_key(pd.concat([df[c] for df in frames], ignore_index=True))
+        for c in by
+    ], names=list(by))
+    return np.argsort(keys.view(np.ndarray), kind='stable')
+
+
+def merge_key(values):
+    values = values.to_numpy()
+    return values.astype(str) if values.dtype == object else values
+
+
+def snapshot_reader(build_path):
+    def read(name, signature):
+        path = build_path('{}.bin'.format(name))
+        if os.path.exists(path):
+            value = read_component_lists(path, signature)
+            if value is None:
+                logger.info('ignoring outdated {} snapshot'.format(name))
+            return value
+        path = build_path('{}.pickle'.format(name))
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as file:
+            if pickle.load(file) != signature:
+                logger.info('ignoring outdated {} snapshot'.format(name))
+                return None
+            return pickle.load(file)
+    return read
+
+
+def snapshot_writer(build_path):
+    def write(value, name, signature):
+        os.makedirs(build_path(), exist_ok=True)
+        binary = isinstance(value, components.ComponentLists)
+        for extension in ('bin', 'pickle'):
+            path = build_path('{}.{}'.format(name, extension))
+            if os.path.exists(path):
+                os.remove(path)
+        path = build_path('{}.{}'.format(name, 'bin' if binary else 'pickle'))
+        with open('{}.tmp'.format(path), 'wb') as file:
+            if binary:
+                write_component_lists(file, value, signature)
+            else:
+                pickle.dump(signature, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace('{}.tmp'.format(path), path)
+    return write
+
+
+# Component lists (compositions and progressions) are stored in a binary
+# format that can be memory-mapped, so that processes share one copy of the
+# (offsets, IDs) arrays through the page cache:
+#
+#   magic | header size (uint32) | JSON header | keys | component table |
+#   padding | offsets (uint32 * (keys + 1)) | IDs (uint32 * ids)
+#
+# Keys and components are NUL-separated UTF-8 strings, and IDs index the
+# component table stored in the file.
+component_lists_magic = b'PJCL'
+
+
+def write_component_lists(file, lists, signature):
+    keys, offsets, ids, table = components.pack(lists)
+    keys = '\0'.join(keys).encode('utf-8')
+    table = '\0'.join(
+        value for component in table for value in component).encode('utf-8')
+    header = json.dumps({
+        'signature': signature,
+        'byteorder': sys.byteorder,
+        'keys': [len(offsets) - 1, len(keys)],
+        'table': len(table),
+        'ids': len(ids)
+    }).encode('utf-8')
+    size = len(component_lists_magic) + 4 + len(header)
+    padding = -(size + len(keys) + len(table)) % offsets.itemsize
+    file.write(component_lists_magic)
+    file.write(len(header).to_bytes(4, 'little'))
+    file.write(header)
+    file.write(keys)
+    file.write(table)
+    file.write(bytes(padding))
+    offsets.tofile(file)
+    ids.tofile(file)
+
+
+def read_component_lists(path, signature):
+    # empty, truncated or otherwise invalid files are treated like outdated
+    # snapshots, so they're rebuilt from the sources
+    with open(path, 'rb') as file:
+        length = os.fstat(file.fileno()).st_size
+        start = len(component_lists_magic) + 4
+        if length < start:
+            return None
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    if view[:len(component_lists_magic)] != component_lists_magic:
+        return None
+    size = int.from_bytes(view[start - 4:start], 'little')
+    header = read_component_lists_header(view[start:start + size])
+    if header is None or start + size > length:
+        return None
+    if header['signature'] != json.loads(json.dumps(signature)):
+        return None
+    if header['byteorder'] != sys.byteorder:
+        return None
+    start += size
+    count, size = header['keys']
+    itemsize = array('I').itemsize
+    end = start + size + header['table']
+    end += -end % itemsize + (count + 1 + header['ids']) * itemsize
+    if end != length:
+        return None
+    keys = str(view[start:start + size], 'utf-8').split('\0')
+    keys = keys if count else []
+    start += size
+    values = str(view[start:start + header['table']], 'utf-8').split('\0')
+    table = list(zip(values[0::2], values[1::2]))
+    start += header['table']
+    start += -start % itemsize
+    size = (count + 1) * itemsize
+    offsets = view[start:start + size].cast('I')
+    start += size
+    ids = view[start:start + header['ids'] * itemsize].cast('I')
+    return components.restore(keys, offsets, ids, table)
+
+
+def read_component_lists_header(view):
+    try:
+        header = json.loads(bytes(view))
+        count, size = header['keys']
+        sizes = (count, size, header['table'], header['ids'])
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not all(isinstance(n, int) and n >= 0 for n in sizes):
+        return None
+    return header
+
+
+def snapshot_signature(sources):
+    files = []
+    for source in sources:
+        if not exists(*source):
+            return None
+        stat = os.stat(path(*source))
+        files.append(('/'.join(source), stat.st_size, stat.st_mtime_ns))
+    return {
+        'version': snapshot_version,
+        'pandas': pd.__version__,
+        'sources': files
+    }
+
+
+def snapshot(name, *sources):
+    def decorate(load):
+        @wraps(load)
+        def load_snapshot():
+            signature = snapshot_signature(sources)
+            if use_snapshots and signature:
+                value = read_snapshot(name, signature)
+                if value is not None:
+                    logger.info('loaded {} snapshot'.format(name))
+                    return value
+            return load()
+        snapshot_loaders[name] = (load, sources)
+        return load_snapshot
+    return decorate
+
+
+def save_snapshot(name):
+    load, sources = snapshot_loaders[name]
+    signature = snapshot_signature(sources)
+    if not signature:
+        logger.warning('skipping {} snapshot (missing sources)'.format(name))
+        return
+    logger.info('saving {} snapshot ...'.format(name))
+    write_snapshot(load(), name, signature)
+    logger.info('saved {} snapshot'.format(name))
+
+
+def save_snapshots():
+    for name in snapshot_loaders:
+        save_snapshot(name)
+
+
 def path_builder(root_path):
     def build(*path):
         return os.path.join(root_path, *path)
@@ -62,7 +427,10 @@ exists = lambda *p: os.path.exists(path(*p))  # noqa: E731
 read_text = text_reader(path)
 read_csv = csv_reader(path)
 write_jsonl = jsonl_writer(path)
+read_jsonl = jsonl_reader(path)
 read_json = json_reader(path)
+read_snapshot = snapshot_reader(path_builder(snapshots_dir))
+write_snapshot = snapshot_writer(path_builder(snapshots_dir))
 
 
 def load_text(*args, **kwargs):
@@ -1,7 +1,8 @@
 import re
 import urllib.parse
+from functools import cache, lru_cache
 import pandas as pd
-from . import kanji, words, sentences
+from . import kanji, words, sentences, templates
 
 
 radical_id_pattern = 'progja:radical:{Kanji}'
@@ -11,24 +12,110 @@ sentence_id_pattern = 'progja:sentence:{Sentence}'
 
 reading_pattern = re.compile('(【[^】]*】)')
 
+# progressions share most of their components (e.g. the progression of a
+# kanji is part of the progression of every word that contains it), so
+# rendered links and progression items are cached as HTML fragments; whole
+# progression lists are rarely repeated, so fewer of them are kept
+fragment_cache_size = 2 ** 16
+progression_cache_size = 2 ** 12
 
-def create_cards(component):
+
+def create_cards(component, records=None):
     component_text, component_type = component
     if component_type == 'radical':
-        return create_radical_cards(component)
+        return create_radical_cards(component, records)
     if component_type == 'kanji':
-        return create_kanji_cards(component)
+        return create_kanji_cards(component, records)
+    if component_type == 'word':
+        return create_word_cards(component, records)
+    if component_type == 'sentence':
+        return create_sentence_cards(component, records)
+    return []
+
+
+def find_card_records(component):
+    component_text, component_type = component
+    if component_type in ('radical', 'kanji'):
+        return kanji.find(component_text)
     if component_type == 'word':
-        return create_word_cards(component)
+        return words.find_common_or_any(component_text)
     if component_type == 'sentence':
-        return create_sentence_cards(component)
+        return sentences.find(component_text)
     return []
 
 
-def create_radical_cards(component):
+def create_batch_cards(components):
+    """
+    Returns the cards of each component, like create_cards(), but prepares and
+    renders the cards of each type in batches with vectorized operations on
+    the components' data frame rows.
+    """
+    cards = [[] for component in components]
+    batches = group_card_rows(components)
+    for (card_type, source, _), (df, positions, owners) in batches.items():
+        df2 = df.iloc[positions].reset_index(drop=True)
+        prepared = prepare_cards(card_type, df2, source == 'common')
+        batch_cards = render_cards(card_type, prepared)
+        for position, card in zip(prepared.index, batch_cards):
+            cards[owners[position]].append(card)
+    return cards
+
+
+def group_card_rows(components):
+    """
+    Returns the rows that the cards of the components are rendered from,
+    grouped by the key of locate_card_rows(): {key: (df, positions, owners)},
+    where owners are the indexes of the components that the rows belong to.
+    """
+    batches = {}
+    for owner, component in enumerate(components):
+        location = locate_card_rows(component)
+        if location is None:
+            continue
+        key, df, positions = location
+        batch = batches.setdefault(key, (df, [], []))
+        batch[1].extend(positions)
+        batch[2].extend([owner] * len(positions))
+    return batches
+
+
+def locate_card_rows(component):
+    component_text, component_type = component
+    if component_type in ('radical', 'kanji'):
+        positions = kanji.locate(component_text)
+        key = (component_type, None, 'kanji')
+        return (key, kanji.load(), positions) if positions is not None else None
+    if component_type == 'word':
+        df, positions, source = words.locate_common_or_any(component_text)
+        # (words are either found in the words or the sometimes-kana frame of
+        # the common or uncommon words)
+        key = ('word', *source)
+        return (key, df, positions) if positions is not None else None
+    if component_type == 'sentence':
+        positions = sentences.locate(component_text)
+        key = ('sentence', None, 'sentences')
+        if positions is None:
+            return None
+        return key, sentences.load(), positions
+    return None
+
+
+def prepare_cards(card_type, df, common=None):
+    if card_type in ('radical', 'kanji'):
+        return prepare_kanji_cards(df, card_type)
+    if card_type == 'word':
+        return prepare_word_cards(df, common)
+    if card_type == 'sentence':
+        return prepare_sentence_cards(df)
+    raise ValueError('unknown card type: {}'.format(card_type))
+
+
+def create_radical_cards(component, records=None):
     component_text, component_type = component
+    if records is None:
+        records = kanji.find(component_text)
     cards = []
-    for radical in kanji.find(component_text):
+    for radical in records:
         if pd.isna(radical['Meaning']):
             continue
         cards.append(create_radical_card(radical))
@@ -36,38 +123,32 @@ def create_radical_cards(component):
 
 
 def create_radical_card(radical, id_pattern=radical_id_pattern):
-    return create_card(
+    return render_card(
+        'radical',
         card_id=id_pattern.format(**radical),
-        front=[
-            *create_question_subject(
-                'What is the meaning of the following radical?',
-                create_jisho_link(radical['Kanji'], 'radical'),
-                subject_classes=['text-japanese']
-            ),
-            *create_div(create_kanji_notes(radical), ['notes'])
-        ],
-        back=[
-            *create_back_section('Meaning', radical['Meaning'], ['meaning']),
-            *create_composition_section(
-                '(none)' if pd.isna(radical['IDS'])
-                else ''.join(create_span(radical['IDS'], ['text-japanese']))
-            ),
-            *create_progression_section(radical['Progression'])
-        ],
-        tags=create_radical_tags(radical),
-        front_classes=['front-radical'],
-        back_classes=['back-radical']
+        fields=create_radical_fields(radical),
+        tags=create_radical_tags(radical)
     )
 
 
+def create_radical_fields(radical):
+    return create_kanji_fields(radical, 'radical')
+
+
+def create_radical_layout(fields):
+    return create_kanji_layout(fields, 'radical')
+
+
 def create_radical_tags(radical):
     return create_kanji_tags(radical)
 
 
-def create_kanji_cards(component):
+def create_kanji_cards(component, records=None):
     component_text, component_type = component
+    if records is None:
+        records = kanji.find(component_text)
     cards = []
-    for kanji_ in kanji.find(component_text):
+    for kanji_ in records:
         if pd.isna(kanji_['Meaning']):
             continue
         cards.append(create_kanji_card(kanji_))
@@ -75,28 +156,49 @@ def create_kanji_cards(component):
 
 
 def create_kanji_card(kanji, id_pattern=kanji_id_pattern):
-    return create_card(
+    return render_card(
+        'kanji',
         card_id=id_pattern.format(**kanji),
-        front=[
+        fields=create_kanji_fields(kanji),
+        tags=create_kanji_tags(kanji)
+    )
+
+
+def create_kanji_fields(kanji, kanji_type='kanji'):
+    return {
+        'Subject': ''.join(create_jisho_link(kanji['Kanji'], kanji_type)),
+        'Notes': create_kanji_notes(kanji),
+        'Meaning': kanji['Meaning'],
+        'Composition': (
+            '(none)' if pd.isna(kanji['IDS'])
+            else ''.join(create_span(kanji['IDS'], ['text-japanese']))
+        ),
+        'Progression': ''.join(create_progression_list(kanji['Progression']))
+    }
+
+
+def create_kanji_layout(fields, kanji_type='kanji'):
+    front = create_front(
+        [
             *create_question_subject(
-                'What is the meaning of the following kanji?',
-                create_jisho_link(kanji['Kanji'], 'kanji'),
+                'What is the meaning of the following {}?'.format(kanji_type),
+                fields['Subject'],
                 subject_classes=['text-japanese']
             ),
-            *create_div(create_kanji_notes(kanji), ['notes'])
+            *create_div(fields['Notes'], ['notes'])
         ],
-        back=[
-            *create_back_section('Meaning', kanji['Meaning'], ['meaning']),
-            *create_composition_section(
-                '(none)' if pd.isna(kanji['IDS'])
-                else ''.join(create_span(kanji['IDS'], ['text-japanese']))
-            ),
-            *create_progression_section(kanji['Progression'])
+        ['front-{}'.format(kanji_type)]
+    )
+    back = create_back(
+        [
+            *create_back_section('Meaning', fields['Meaning'], ['meaning']),
+            *create_composition_section(fields['Composition']),
+            *create_back_section(
+                'Progression', fields['Progression'], ['progression'])
         ],
-        tags=create_kanji_tags(kanji),
-        front_classes=['front-kanji'],
-        back_classes=['back-kanji']
+        ['back-{}'.format(kanji_type)]
     )
+    return front, back
 
 
 def create_kanji_notes(kanji):
@@ -131,44 +233,111 @@ def create_kanji_tags(kanji):
     return sorted(list(tags))
 
 
-def create_word_cards(component):
+def prepare_kanji_cards(df, kanji_type='kanji'):
+    """
+    Prepares the IDs, fields and tags of the cards for a data frame of kanji.
+    """
+    df = df[df['Meaning'].notna()]
+    fragments = load_fragment_templates()
+    progressions = kanji.load_progressions()
+    id_pattern = radical_id_pattern if kanji_type == 'radical' \
+        else kanji_id_pattern
+    grades = format_column(df['Grade'])
+    jlpt = format_column(df['JLPT'])
+    has_grade = df['Grade'].notna()
+    has_jlpt = df['JLPT'].notna()
+    notes = join_columns([
+        where_column(df['IsJouyou'], 'Grade ' + grades + ' Jōyō kanji'),
+        where_column(df['IsJinmeiyou'], 'Grade ' + grades + ' Jinmeiyō kanji'),
+        where_column(has_jlpt, 'JLPT N' + jlpt)
+    ], ', ')
+    kanji_tag = 'progja::kanji'
+    strokes = format_column(df['Strokes'].fillna(0))
+    # (the tags are joined in sorted order)
+    tags = join_columns([
+        pd.Series(kanji_tag, index=df.index, dtype=object),
+        where_column(
+            has_grade, '{}::grade::'.format(kanji_tag) + pad_column(grades)),
+        where_column(df['IsJinmeiyou'], '{}::jinmeiyou'.format(kanji_tag)),
+        where_column(has_jlpt, '{}::jlpt'.format(kanji_tag)),
+        where_column(has_jlpt, '{}::jlpt::n'.format(kanji_tag) + jlpt),
+        where_column(df['IsJouyou'], '{}::jouyou'.format(kanji_tag)),
+        where_column(df['IsRadical'], '{}::radical'.format(kanji_tag)),
+        '{}::strokes::'.format(kanji_tag) + pad_column(strokes)
+    ], ' ')
+    return pd.DataFrame({
+        'ID': id_pattern.format(Kanji='') + df['Kanji'],
+        'Subject': [
+            _create_jisho_link(kanji_, kanji_type) for kanji_ in df['Kanji']
+        ],
+        'Notes': wrap_column(notes),
+        'Meaning': df['Meaning'],
+        'Composition': fragments['japanese'].render_columns({
+            'Text': df['IDS'].fillna('')
+        }).where(df['IDS'].notna(), '(none)'),
+        'Progression': create_progression_column(df['Kanji'], progressions),
+        'Tags': tags
+    }, index=df.index)
+
+
+def create_word_cards(component, records=None):
     component_text, component_type = component
-    found = words.find_common_or_any(component_text)
+    if records is None:
+        records = words.find_common_or_any(component_text)
     cards = []
-    for word in found:
+    for word in records:
         cards.append(create_word_card(word))
     return cards
 
 
 def create_word_card(word, id_pattern=word_id_pattern):
-    return create_card(
+    return render_card(
+        'word',
         card_id=id_pattern.format(**word),
-        front=[
+        fields=create_word_fields(word),
+        tags=create_word_tags(word)
+    )
+
+
+def create_word_fields(word):
+    return {
+        'Subject': ''.join(create_jisho_link(word['Word'], 'word')),
+        'Notes': create_word_notes(word),
+        'Reading': word['Reading'],
+        'Definition': ''.join(
+            create_word_definition_list(word['Definitions'])),
+        'Progression': ''.join(create_progression_list(word['Progression']))
+    }
+
+
+def create_word_layout(fields):
+    front = create_front(
+        [
             *create_question_subject(
                 'What is the definition of the following word?',
-                create_jisho_link(word['Word'], 'word'),
+                fields['Subject'],
                 subject_classes=['text-japanese']
             ),
-            *create_div(create_word_notes(word), ['notes'])
+            *create_div(fields['Notes'], ['notes'])
         ],
-        back=[
+        ['front-word']
+    )
+    back = create_back(
+        [
             *create_back_section(
                 'Reading',
-                word['Reading'],
+                fields['Reading'],
                 ['reading'],
                 contents_classes=['text-japanese']
             ),
             *create_back_section(
-                'Definition',
-                create_word_definition_list(word['Definitions']),
-                ['definition']
-            ),
-            *create_progression_section(word['Progression'])
+                'Definition', fields['Definition'], ['definition']),
+            *create_back_section(
+                'Progression', fields['Progression'], ['progression'])
         ],
-        tags=create_word_tags(word),
-        front_classes=['front-word'],
-        back_classes=['back-word']
+        ['back-word']
     )
+    return front, back
 
 
 def create_word_notes(word):
@@ -212,6 +381,90 @@ def create_word_tags(word):
     return sorted(list(tags))
 
 
+def prepare_word_cards(df, common=None):
+    """
+    Prepares the IDs, fields and tags of the cards for a data frame of words.
+    """
+    fragments = load_fragment_templates()
+    progressions = words.load_progressions()
+    reading_html = fragments['japanese'].render_columns({'Text': df['Reading']})
+    notes = join_columns([
+        where_column(df['IsCommon'], 'Common word'),
+        where_column(df['IsUsuallyKana'], 'Usually written ' + reading_html),
+        where_column(
+            ~df['IsUsuallyKana'] & df['IsSometimesKana'],
+            'Sometimes written ' + reading_html)
+    ], ', ')
+    word_tag = 'progja::word'
+    priority_tag = '{}::priority'.format(word_tag)
+    priorities = {
+        name: df['Priority{}'.format(name)]
+        for name in ('NF', 'Ichi', 'News', 'Spec', 'Gai')
+    }
+    has_priority = pd.concat(priorities.values(), axis=1).gt(0).any(axis=1)
+
+    def create_priority_tags(name, values):
+        return where_column(
+            priorities[name] > 0,
+            '{}::{}::'.format(priority_tag, name.lower()) + values)
+
+    # (the tags are joined in sorted order)
+    tags = join_columns([
+        pd.Series(word_tag, index=df.index, dtype=object),
+        where_column(df['IsCommon'], '{}::common'.format(word_tag)),
+        where_column(has_priority, priority_tag),
+        create_priority_tags('Gai', format_column(priorities['Gai'])),
+        create_priority_tags('Ichi', format_column(priorities['Ichi'])),
+        create_priority_tags('News', format_column(priorities['News'])),
+        create_priority_tags(
+            'NF', pad_column(format_column(priorities['NF']))),
+        create_priority_tags('Spec', format_column(priorities['Spec'])),
+        where_column(
+            df['IsSometimesKana'], '{}::sometimes_kana'.format(word_tag)),
+        where_column(df['IsUsuallyKana'], '{}::usually_kana'.format(word_tag))
+    ], ' ')
+    return pd.DataFrame({
+        'ID': word_id_pattern.format(ID='') + format_column(df['ID']),
+        'Subject': [_create_jisho_link(word, 'word') for word in df['Word']],
+        'Notes': wrap_column(notes),
+        'Reading': df['Reading'],
+        'Definition': create_word_definition_column(df, common),
+        'Progression': create_progression_column(df['Word'], progressions),
+        'Tags': tags
+    }, index=df.index)
+
+
+def create_word_definition_column(df, common=None):
+    fragments = load_fragment_templates()
+    entity_map = words.load_entities()
+    df2 = words.load_common_definitions() if common \
+        else words.load_definitions()
+    index = words.load_common_index() if common else words.load_index()
+    keys = list(zip(df['Word'], df['Reading']))
+    positions = [
+        position
+        for key in dict.fromkeys(keys)
+        for position in index['Definitions'].get(key, [])
+    ]
+    df3 = df2.iloc[positions]
+    parts_of_speech = {
+        value: '; '.join([
+            entity_map.get(entity[1:-1], entity)
+            for entity in value.split(' ')
+        ])
+        for value in df3['PartOfSpeech'].unique()
+    }
+    items = fragments['definition'].render_columns({
+        'PartOfSpeech': df3['PartOfSpeech'].map(parts_of_speech).astype(object),
+        'Glosses': df3['Glosses']
+    })
+    items = items.groupby([df3['Word'], df3['Reading']], sort=False) \
+        .agg(''.join)
+    return fragments['definitions'].render_columns({
+        'Items': pd.Series([items.get(key, '') for key in keys], index=df.index)
+    })
+
+
 def create_word_definition_list(definitions):
     entity_map = words.load_entities()
     items = []
@@ -227,43 +480,64 @@ def create_word_definition_list(definitions):
     return create_ordered_list(items)
 
 
-def create_sentence_cards(component):
+def create_sentence_cards(component, records=None):
     component_text, component_type = component
+    if records is None:
+        records = sentences.find(component_text)
     cards = []
-    for sentence in sentences.find(component_text):
+    for sentence in records:
         cards.append(create_sentence_card(sentence))
     return cards
 
 
 def create_sentence_card(sentence, id_pattern=sentence_id_pattern):
-    return create_card(
+    return render_card(
+        'sentence',
         card_id=id_pattern.format(**sentence),
-        front=create_question_subject(
+        fields=create_sentence_fields(sentence),
+        tags=create_sentence_tags(sentence)
+    )
+
+
+def create_sentence_fields(sentence):
+    return {
+        'Subject': ''.join(
+            create_jisho_link(sentence['Sentence'], 'sentence')),
+        'Reading': create_sentence_reading(sentence['Reading']),
+        'Translations': ''.join(create_unordered_list([
+            translation['Translation']
+            for translation in sentence['Translations']
+        ])),
+        'Progression': ''.join(
+            create_progression_list(sentence['Progression']))
+    }
+
+
+def create_sentence_layout(fields):
+    front = create_front(
+        create_question_subject(
             'What is the translation of the following sentence?',
-            create_jisho_link(sentence['Sentence'], 'sentence'),
+            fields['Subject'],
             subject_classes=['text-japanese']
         ),
-        back=[
+        ['front-sentence']
+    )
+    back = create_back(
+        [
             *create_back_section(
                 'Reading',
-                create_sentence_reading(sentence['Reading']),
+                fields['Reading'],
                 ['reading'],
                 contents_classes=['text-japanese']
             ),
             *create_back_section(
-                'Translations',
-                create_unordered_list([
-                    translation['Translation']
-                    for translation in sentence['Translations']
-                ]),
-                ['translations']
-            ),
-            *create_progression_section(sentence['Progression'])
+                'Translations', fields['Translations'], ['translations']),
+            *create_back_section(
+                'Progression', fields['Progression'], ['progression'])
         ],
-        tags=create_sentence_tags(sentence),
-        front_classes=['front-sentence'],
-        back_classes=['back-sentence']
+        ['back-sentence']
     )
+    return front, back
 
 
 def create_sentence_reading(reading):
@@ -280,6 +554,55 @@ def create_sentence_tags(sentence):
     return sorted(list(tags))
 
 
+def prepare_sentence_cards(df):
+    """
+    Prepares the IDs, fields and tags of the cards for a data frame of
+    sentences.
+    """
+    progressions = sentences.load_progressions()
+    reading_html = ''.join(create_span('\\1', ['reading']))
+    return pd.DataFrame({
+        'ID': sentence_id_pattern.format(Sentence='') + df['Sentence'],
+        'Subject': [
+            _create_jisho_link(sentence, 'sentence')
+            for sentence in df['Sentence']
+        ],
+        'Reading': df['Reading'].str.replace(
+            reading_pattern, reading_html, regex=True),
+        'Translations': create_sentence_translation_column(df),
+        'Progression': create_progression_column(df['Sentence'], progressions),
+        'Tags': pd.Series('progja::sentence', index=df.index, dtype=object)
+    }, index=df.index)
+
+
+def create_sentence_translation_column(df):
+    fragments = load_fragment_templates()
+    df2 = sentences.load_translations()
+    index = sentences.load_translations_index()
+    keys = list(df['Sentence'])
+    positions = [
+        position
+        for key in dict.fromkeys(keys)
+        for position in index.get(key, [])
+    ]
+    df3 = df2.iloc[positions]
+    items = fragments['translation'].render_columns({
+        'Translation': df3['Translation']
+    })
+    items = items.groupby(df3['Sentence'], sort=False).agg(''.join)
+    return fragments['translations'].render_columns({
+        'Items': pd.Series([items.get(key, '') for key in keys], index=df.index)
+    })
+
+
+card_layouts = {
+    'radical': create_radical_layout,
+    'kanji': create_kanji_layout,
+    'word': create_word_layout,
+    'sentence': create_sentence_layout
+}
+
+
 def create_card(
         card_id, front, back, tags, front_classes=None, back_classes=None):
     return {
@@ -290,6 +613,89 @@ def create_card(
     }
 
 
+def render_card(card_type, card_id, fields, tags):
+    front, back = load_card_templates()[card_type]
+    return {
+        'ID': card_id,
+        'Front': front.render(fields),
+        'Back': back.render(fields),
+        'Tags': ' '.join(tags)
+    }
+
+
+@cache
+def load_card_templates():
+    # templates are compiled from the layouts, so they render the same HTML
+    # without building it from nested lists of strings for every card
+    return {
+        card_type: templates.compile_layout(layout)
+        for card_type, layout in card_layouts.items()
+    }
+
+
+def render_cards(card_type, prepared):
+    front, back = load_card_templates()[card_type]
+    return pd.DataFrame({
+        'ID': prepared['ID'],
+        'Front': front.render_columns(prepared),
+        'Back': back.render_columns(prepared),
+        'Tags': prepared['Tags']
+    }, index=prepared.index).to_dict('records')
+
+
+@cache
+def load_fragment_templates():
+    field = templates.create_field
+    return {
+        'japanese': templates.Template(''.join(
+            create_span(field('Text'), ['text-japanese']))),
+        'definition': templates.Template(''.join(create_list_item([
+            *create_span(field('PartOfSpeech'), ['part-of-speech']),
+            *create_span(field('Glosses'), ['glosses'])
+        ]))),
+        'definitions': templates.Template(''.join(
+            create_el('ol', field('Items')))),
+        'translation': templates.Template(''.join(
+            create_list_item(field('Translation')))),
+        'translations': templates.Template(''.join(
+            create_el('ul', field('Items'))))
+    }
+
+
+def create_progression_column(texts, progressions):
+    return [
+        ''.join(create_progression_list(progressions.get(text, [])))
+        for text in texts
+    ]
+
+
+def format_column(column):
+    return column.astype(object).map(str)
+
+
+def pad_column(column):
+    return ('00' + column).str[-2:]
+
+
+def wrap_column(column):
+    return ('(' + column + ')').where(column != '', '')
+
+
+def where_column(mask, values):
+    if isinstance(values, str):
+        values = pd.Series(values, index=mask.index, dtype=object)
+    return values.where(mask, '')
+
+
+def join_columns(columns, separator):
+    # empty strings are skipped, like missing items in a list
+    joined = columns[0]
+    for column in columns[1:]:
+        joined = joined + (separator + column).where(
+            (joined != '') & (column != ''), column)
+    return joined
+
+
 def create_front(contents, front_classes=None):
     front_classes = ['front', *(front_classes or [])]
     return ''.join(create_div(contents, front_classes))
@@ -329,18 +735,28 @@ def create_progression_section(progression):
 
 
 def create_progression_list(progression):
-    return create_ordered_list([
-        [
-            *create_span(
-                create_jisho_link(component_text, component_type),
-                ['component-text', 'text-japanese']
-            ),
-            ' (',
-            *create_span(component_type, ['component-type']),
-            ')'
-        ]
+    return [_create_progression_list(tuple(map(tuple, progression)))]
+
+
+@lru_cache(maxsize=progression_cache_size)
+def _create_progression_list(progression):
+    return ''.join(create_el('ol', [
+        _create_progression_item(component_text, component_type)
         for component_text, component_type in progression
-    ])
+    ]))
+
+
+@lru_cache(maxsize=fragment_cache_size)
+def _create_progression_item(component_text, component_type):
+    return ''.join(create_list_item([
+        *create_span(
+            create_jisho_link(component_text, component_type),
+            ['component-text', 'text-japanese']
+        ),
+        ' (',
+        *create_span(component_type, ['component-type']),
+        ')'
+    ]))
 
 
 def create_back_section(
@@ -359,13 +775,18 @@ def create_back_section(
 
 
 def create_jisho_link(component_text, component_type):
+    return [_create_jisho_link(component_text, component_type)]
+
+
+@lru_cache(maxsize=fragment_cache_size)
+def _create_jisho_link(component_text, component_type):
     search_url = 'https://jisho.org/search'
     kanji_types = ('radical', 'radical-variant', 'kanji', 'kanji-variant')
     query = component_text
     if component_type in kanji_types:
         query = '{} #kanji'.format(component_text[0])
     href = '{}/{}'.format(search_url, urllib.parse.quote(query))
-    return create_anchor(component_text, href)
+    return ''.join(create_anchor(component_text, href))
 
 
 def create_anchor(content, href, attributes=None):
@@ -1,7 +1,9 @@
 import logging
 from functools import cache
 from random import randint
+import numpy as np
 from . import data
+from .components import ComponentLists
 
 
 logger = logging.getLogger(__name__)
@@ -28,7 +30,7 @@ def find(character):
     df = load()
     compositions = load_compositions()
     progressions = load_progressions()
-    df2 = df[df['Kanji'] == character]
+    df2 = data.select_rows(df, locate(character))
     records = df2.to_dict('records')
     for record in records:
         record['Composition'] = compositions.get(record['Kanji'], [])
@@ -36,13 +38,83 @@ def find(character):
     return records
 
 
+def locate(character):
+    return load_index().get(character)
+
+
+def query(
+        grade=None, jlpt=None, strokes=None, radical=None, jouyou=None,
+        jinmeiyou=None, contains_component=None):
+    """
+    Returns the kanji that match all of the given filters, in the same order
+    as load(). grade and jlpt match a value or any of a collection of values,
+    strokes matches a value or an inclusive (min, max) range (a tuple or
+    list, where either bound can be None), and contains_component matches
+    the kanji whose composition contains a component (or one of its
+    variants).
+    """
+    positions = query_positions(
+        grade, jlpt, strokes, radical, jouyou, jinmeiyou, contains_component)
+    return load().iloc[positions].reset_index(drop=True)
+
+
+def query_positions(
+        grade=None, jlpt=None, strokes=None, radical=None, jouyou=None,
+        jinmeiyou=None, contains_component=None):
+    index = load_query_index()
+    selections = []
+    for column, values in (
+            ('Grade', grade),
+            ('JLPT', jlpt),
+            ('IsRadical', radical),
+            ('IsJouyou', jouyou),
+            ('IsJinmeiyou', jinmeiyou)):
+        if values is not None:
+            selections.append(select_positions(index[column], values))
+    if strokes is not None:
+        selections.append(select_range_positions(index['Strokes'], strokes))
+    if contains_component is not None:
+        selections.append(select_positions(
+            load_component_index(), contains_component))
+    if not selections:
+        return np.arange(len(load()))
+    # every selection is sorted, so the positions stay in load() order
+    positions = selections[0]
+    for selection in selections[1:]:
+        positions = np.intersect1d(positions, selection, assume_unique=True)
+    return positions
+
+
+def select_positions(index, values):
+    if not isinstance(values, (list, tuple, set, frozenset, range)):
+        values = [values]
+    selections = [index[value] for value in values if value in index]
+    if not selections:
+        return np.empty(0, dtype=np.intp)
+    if len(selections) == 1:
+        return selections[0]
+    return np.unique(np.concatenate(selections))
+
+
+def select_range_positions(index, bounds):
+    positions, values = index
+    if isinstance(bounds, (list, tuple)):
+        if len(bounds) != 2:
+            raise ValueError(
+                'expected a value or a (min, max) range: {!r}'.format(bounds))
+        low, high = bounds
+    else:
+        low, high = bounds, bounds
+    start = 0 if low is None else np.searchsorted(values, low, 'left')
+    end = len(values) if high is None \
+        else np.searchsorted(values, high, 'right')
+    return np.sort(positions[start:end])
+
+
 @cache
 def load_radicals():
     logger.info('loading radicals ...')
-    df = load()
-    df = df[df['IsRadical']] \
-        .sort_values(['Grade', 'Strokes', 'Kanji']) \
-        .reset_index(drop=True)
+    df = query(radical=True)
     logger.info('loaded radicals')
     return df
 
@@ -50,10 +122,7 @@ def load_radicals():
 @cache
 def load_jouyou():
     logger.info('loading Jōyō kanji ...')
-    df = load()
-    df = df[df['IsJouyou']] \
-        .sort_values(['Grade', 'Strokes', 'Kanji']) \
-        .reset_index(drop=True)
+    df = query(jouyou=True)
     logger.info('loaded Jōyō kanji')
     return df
 
@@ -61,15 +130,13 @@ def load_jouyou():
 @cache
 def load_jinmeiyou():
     logger.info('loading Jinmeiyō kanji ...')
-    df = load()
-    df = df[df['IsJinmeiyou']] \
-        .sort_values(['Grade', 'Strokes', 'Kanji']) \
-        .reset_index(drop=True)
+    df = query(jinmeiyou=True)
     logger.info('loaded Jinmeiyō kanji')
     return df
 
 
 @cache
+@data.snapshot('kanji', ('kanji', 'kanji.csv'))
 def load():
     logger.info('loading kanji ...')
     dtypes = {
@@ -84,20 +151,66 @@ def load():
     return df
 
 
+@cache
+def load_index():
+    logger.info('indexing kanji ...')
+    index = data.index_rows(load(), 'Kanji')
+    logger.info('indexed kanji')
+    return index
+
+
+@cache
+def load_query_index():
+    # secondary indexes of the positions of the kanji in load(), sorted so
+    # that queries can intersect them without scanning the data frame
+    logger.info('indexing kanji attributes ...')
+    df = load()
+    index = {
+        column: data.index_rows(df, column)
+        for column in ('Grade', 'JLPT', 'IsRadical', 'IsJouyou', 'IsJinmeiyou')
+    }
+    strokes = df['Strokes'].dropna()
+    order = np.argsort(strokes.to_numpy(dtype=np.int64), kind='stable')
+    index['Strokes'] = (
+        strokes.index.to_numpy()[order],
+        strokes.to_numpy(dtype=np.int64)[order]
+    )
+    logger.info('indexed kanji attributes')
+    return index
+
+
+@cache
+def load_component_index():
+    # an inverted index of the kanji that each component (or the root of a
+    # variant) is part of (compositions are loaded with load_radicals(), so
+    # this isn't part of the attribute indexes)
+    logger.info('indexing kanji components ...')
+    compositions = load_compositions()
+    components = {}
+    for position, kanji in enumerate(load()['Kanji']):
+        for component in compositions.get(kanji, []):
+            for text in (component[0], component[0][0]):
+                positions = components.setdefault(text, [])
+                if not positions or positions[-1] != position:
+                    positions.append(position)
+    index = {
+        text: np.array(positions, dtype=np.intp)
+        for text, positions in components.items()
+    }
+    logger.info('indexed kanji components')
+    return index
+
+
 @cache
 def count_components():
     logger.info('counting kanji components ...')
-    counts = {}
-    for composition in load_compositions().values():
-        for component in composition:
-            counts.setdefault(component, 0)
-            counts[component] += 1
-    counts = dict(sorted(counts.items(), key=lambda c: -1 * c[1]))
+    counts = load_compositions().count()
     logger.info('counted kanji components')
     return counts
 
 
 @cache
+@data.snapshot('kanji-compositions', ('kanji', 'kanji.csv'))
 def load_compositions():
     logger.info('loading kanji compositions ...')
     df = load()
@@ -116,6 +229,7 @@ def load_compositions():
                 continue
             composition.append((component, classify(component)))
         compositions[kanji] = composition
+    compositions = ComponentLists(compositions)
     logger.info('loaded kanji compositions')
     return compositions
 
@@ -123,30 +237,37 @@ def load_compositions():
 @cache
 def count_progression_components():
     logger.info('counting kanji progression components ...')
-    counts = {}
-    for progression in load_progressions().values():
-        for component in progression:
-            counts.setdefault(component, 0)
-            counts[component] += 1
-    counts = dict(sorted(counts.items(), key=lambda c: -1 * c[1]))
+    counts = load_progressions().count()
     logger.info('counted kanji progression components')
     return counts
 
 
 @cache
+@data.snapshot('kanji-progressions', ('kanji', 'kanji-progressions.json'))
 def load_progressions():
     logger.info('loading kanji progressions ...')
-    rows = data.read_json('kanji', 'kanji-progressions.json')
-    progressions = {
-        row['Kanji']: [tuple(c) for c in row['Progression']]
-        for row in rows
-    }
+    rows = data.read_jsonl('kanji', 'kanji-progressions.json')
+    progressions = ComponentLists(
+        (row['Kanji'], map(tuple, row['Progression'])) for row in rows)
     logger.info('loaded kanji progressions')
     return progressions
 
 
 def progression_builder(compositions):
+    # a component's progression doesn't depend on the root that it's part of,
+    # so progressions are memoized and shared across roots
+    progressions = {}
+
     def build_progression(root_component):
+        return list(get_progression(root_component))
+
+    def get_progression(root_component):
+        if root_component not in progressions:
+            progression = create_progression(root_component)
+            progressions[root_component] = tuple(progression)
+        return progressions[root_component]
+
+    def create_progression(root_component):
         # if the root component is a variant, remember it for later
         variant = None
         if len(root_component[0]) > 1:
@@ -158,31 +279,29 @@ def progression_builder(compositions):
                 else 'kanji-component'
             )
             root_component = (root_component[0][0], component_type)
-        # start the progression with the root component
-        progression = [root_component]
+        # start the progression with the root component (the progression is
+        # an ordered set of components)
+        progression = {root_component: None}
         # add progressions for each subcomponent
         composition = compositions.get(root_component[0], [])
         for component in composition[::-1]:
             # check for variant components
             if component[0][0] == root_component[0][0]:
                 if len(component[0]) > 1:
-                    if component not in progression:
-                        progression.append(component)
+                    progression.setdefault(component)
                 continue
             # check for recursive components
             components = compositions.get(component[0], [])
             if any(c in (root_component, variant) for c in components):
                 continue
             # get the component's progression
-            components = build_progression(component)
+            components = get_progression(component)
             # add new components or move them earlier in the progression
-            progression = [c for c in progression if c not in components]
-            progression = [*components, *progression]
+            progression = dict.fromkeys([*components, *progression])
         # if the root component was a variant, add it to the end
         if variant:
-            if variant in progression:
-                progression.remove(variant)
-            progression.append(variant)
+            progression.pop(variant, None)
+            progression[variant] = None
         return progression
     return build_progression
 
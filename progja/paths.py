@@ -1,11 +1,15 @@
 import logging
 from functools import cache
-from . import data
+from heapq import heappop, heappush
+from itertools import zip_longest
+from . import data, kanji, words, sentences, unlocks
+from .components import registry
 
 
 logger = logging.getLogger(__name__)
 
 levels = (1, 2, 3, 4, 5)
+kanji_types = ('radical', 'radical-variant', 'kanji', 'kanji-variant')
 
 
 @cache
@@ -24,3 +28,210 @@ def load_level(level):
         .reset_index(drop=True)
     logger.info('loaded level {} path'.format(level))
     return df
+
+
+def create_personalized_path(
+        known, target_kanji=(), target_words=(), target_components=()):
+    """
+    Returns a path for a learner who already knows some components (e.g. the
+    components of the cards in their Anki collection) and wants to learn some
+    kanji, words and other components. Sentences are only unlocked once all of
+    their components are known or on the path, so the most common sentence
+    components (see sentences.count_components()) are usually worth adding.
+    The path only adds sentences that the learner doesn't know yet.
+    """
+    known = set(map(tuple, known))
+    candidates = [
+        sentence
+        for sentence in unlocks.load_sentence_dependents().roots
+        if (sentence, 'sentence') not in known
+    ]
+    return create_path(
+        known, target_kanji, target_words, target_components, candidates)
+
+
+def create_path(
+        known=(), target_kanji=(), target_words=(), target_components=(),
+        candidates=None):
+    """
+    Returns a path (a list of components) that adds the progressions of new
+    kanji, words and components to the known components, along with the
+    sentences that they unlock. If candidates is given, only those sentences
+    are added to the path. Raises a ValueError if a kanji or word has no
+    progression.
+    """
+    known = set(map(tuple, known))
+    # filter out known kanji
+    new_kanji = [k for k in target_kanji if (k, 'kanji') not in known]
+    logger.info('adding {} new kanji'.format(len(new_kanji)))
+    # filter out known words
+    new_words = [w for w in target_words if (w, 'word') not in known]
+    logger.info('adding {} new words'.format(len(new_words)))
+    # filter out known components
+    known_components = {
+        *known,
+        *[(k, 'kanji') for k in new_kanji],
+        *[(w, 'word') for w in new_words]
+    }
+    new_components = [
+        tuple(c) for c in target_components
+        if tuple(c) not in known_components
+    ]
+    logger.info('adding {} new components'.format(len(new_components)))
+    unknown = find_unknown_components([
+        *[(k, 'kanji') for k in new_kanji],
+        *[(w, 'word') for w in new_words],
+        *new_components
+    ])
+    if unknown:
+        raise ValueError('Unknown components: {}'.format(', '.join(
+            '{} ({})'.format(*component) for component in unknown)))
+    return build_path(known, new_kanji, new_words, new_components, candidates)
+
+
+def find_unknown_components(components):
+    # the kanji and words that have no progression to add to a path
+    kanji_progressions = kanji.load_progressions()
+    word_progressions = words.load_progressions()
+    return [
+        component
+        for component in components
+        if component[1] in kanji_types
+        and component[0][0] not in kanji_progressions
+        or component[1] == 'word'
+        and component[0] not in word_progressions
+    ]
+
+
+def build_path(known, new_kanji, new_words, new_components, candidates=None):
+    logger.info('building path ...')
+    path = create_initial_path(new_kanji, new_words, new_components)
+    path = add_progressions_to_path(path, known)
+    path = add_sentences_to_path(path, known, candidates)
+    logger.info('built path')
+    return path
+
+
+def create_initial_path(new_kanji, new_words, new_components):
+    logger.info('creating initial path ...')
+    kanji_components = [(character, 'kanji') for character in new_kanji]
+    word_components = [(word, 'word') for word in new_words]
+    groups = zip_longest(kanji_components, word_components, new_components)
+    path = {}
+    for group in groups:
+        for component in group:
+            if not component:
+                continue
+            path[component] = None
+    logger.info('created initial path')
+    return list(path.keys())
+
+
+def add_progressions_to_path(path, known):
+    logger.info('adding progressions to path ...')
+    kanji_progressions = kanji.load_progressions()
+    word_progressions = words.load_progressions()
+    new_path = {}
+    for component in path:
+        dependencies = []
+        if component[1] in kanji_types:
+            dependencies = kanji_progressions[component[0][0]][:-1]
+        if component[1] == 'word':
+            dependencies = word_progressions[component[0]][:-1]
+        for dependency in dependencies:
+            if dependency in known:
+                continue
+            if dependency in new_path:
+                continue
+            new_path[dependency] = None
+        if component not in new_path:
+            new_path[component] = None
+    logger.info('added progressions to path')
+    return list(new_path.keys())
+
+
+def add_sentences_to_path(path, known, candidates=None):
+    logger.info('adding sentences to path ...')
+    unlockable = find_unlockable_sentences(path, known, candidates)
+    # components are encoded as their index in the path, and sentences are
+    # encoded as their index in the list of unlockable sentences (which is
+    # sorted by priority), and components that were never interned aren't
+    # part of any sentence composition
+    path_indexes = {
+        registry[c]: i for i, c in enumerate(path) if c in registry
+    }
+    compositions = []
+    dependents = [[] for _ in path]
+    unlocked_by = [[] for _ in path]
+    for s, (unlocked_at, _, composition) in enumerate(unlockable):
+        encoded = list(dict.fromkeys(
+            path_indexes[c] for c in composition if c in path_indexes))
+        compositions.append(encoded)
+        for i in encoded:
+            dependents[i].append(s)
+        unlocked_by[unlocked_at].append(s)
+    unseen = [False] * len(path)
+    unseen_counts = [0] * len(unlockable)
+    unlocked = [False] * len(unlockable)
+    queue = []
+    new_path = {}
+    for i, component in enumerate(path):
+        # add the component to the path and mark it unseen
+        new_path[component] = None
+        unseen[i] = True
+        for s in dependents[i]:
+            unseen_counts[s] += 1
+            if unseen_counts[s] == 1 and unlocked[s]:
+                heappush(queue, s)
+        # unlock sentences whose dependencies are all on the path by now
+        for s in unlocked_by[i]:
+            unlocked[s] = True
+            if unseen_counts[s] > 0:
+                heappush(queue, s)
+        # try to find a sentence with an unseen component
+        while queue:
+            s = heappop(queue)
+            sentence_component = (unlockable[s][1], 'sentence')
+            if unseen_counts[s] == 0 or sentence_component in new_path:
+                continue
+            new_path[sentence_component] = None
+            for j in compositions[s]:
+                if not unseen[j]:
+                    continue
+                unseen[j] = False
+                for s2 in dependents[j]:
+                    unseen_counts[s2] -= 1
+            break
+    logger.info('added sentences to path')
+    return list(new_path.keys())
+
+
+def find_unlockable_sentences(path, known, candidates=None):
+    logger.info('finding unlockable sentences ...')
+    compositions = sentences.load_compositions()
+    dependents = unlocks.load_sentence_dependents()
+    # a sentence is unlocked by the last of its dependencies on the path, if
+    # all of its other dependencies are known (components are looked up
+    # without interning them, because components that were never interned
+    # aren't part of any sentence progression)
+    unlocked = dependents.find_unlocked(
+        [registry.get(c) for c in path],
+        [registry[c] for c in known if c in registry])
+    if candidates is not None:
+        candidates = set(candidates)
+        unlocked = {
+            sentence: unlocked_at
+            for sentence, unlocked_at in unlocked.items()
+            if sentence in candidates
+        }
+    unlockable = [
+        (
+            unlocked_at,
+            sentence,
+            compositions.ids_of(sentence) if sentence in compositions else []
+        )
+        for sentence, unlocked_at in unlocked.items()
+    ]
+    unlockable = sorted(unlockable, key=lambda r: (r[0], r[1]))
+    logger.info('found {} unlockable sentences'.format(len(unlockable)))
+    return unlockable
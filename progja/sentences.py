@@ -2,6 +2,7 @@ import logging
 from functools import cache
 from random import randint
 from . import data, kanji, words
+from .components import ComponentLists
 
 
 logger = logging.getLogger(__name__)
@@ -16,19 +17,25 @@ def random():
 def find(sentence):
     df = load()
     df2 = load_translations()
+    index2 = load_translations_index()
     compositions = load_compositions()
     progressions = load_progressions()
-    df3 = df[df['Sentence'] == sentence]
+    df3 = data.select_rows(df, locate(sentence))
     records = df3.to_dict('records')
     for record in records:
-        df3 = df2[df2['Sentence'] == record['Sentence']]
+        df3 = data.select_rows(df2, index2.get(record['Sentence']))
         record['Translations'] = df3.to_dict('records')
         record['Composition'] = compositions.get(record['Sentence'], [])
         record['Progression'] = progressions.get(record['Sentence'], [])
     return records
 
 
+def locate(sentence):
+    return load_index().get(sentence)
+
+
 @cache
+@data.snapshot('sentences', ('sentences', 'sentences.csv'))
 def load():
     logger.info('loading sentences ...')
     df = data.read_csv('sentences', 'sentences.csv') \
@@ -39,6 +46,16 @@ def load():
 
 
 @cache
+def load_index():
+    logger.info('indexing sentences ...')
+    index = data.index_rows(load(), 'Sentence')
+    logger.info('indexed sentences')
+    return index
+
+
+@cache
+@data.snapshot(
+    'sentence-translations', ('sentences', 'sentence-translations.csv'))
 def load_translations():
     logger.info('loading sentence translations ...')
     df = data.read_csv('sentences', 'sentence-translations.csv') \
@@ -48,31 +65,39 @@ def load_translations():
     return df
 
 
+@cache
+def load_translations_index():
+    logger.info('indexing sentence translations ...')
+    index = data.index_rows(load_translations(), 'Sentence')
+    logger.info('indexed sentence translations')
+    return index
+
+
 @cache
 def count_components():
     logger.info('counting sentence components ...')
-    counts = {}
-    for composition in load_compositions().values():
-        for component in composition:
-            counts.setdefault(component, 0)
-            counts[component] += 1
-    counts = dict(sorted(counts.items(), key=lambda c: -1 * c[1]))
+    counts = load_compositions().count()
     logger.info('counted sentence components')
     return counts
 
 
 @cache
+@data.snapshot(
+    'sentence-compositions',
+    ('sentences', 'sentence-compositions.json'),
+    ('words', 'words-common.csv'),
+    ('words', 'words-uncommon.csv'))
 def load_compositions():
     logger.info('loading sentence compositions')
     classify = words.component_classifier()
-    rows = data.read_json('sentences', 'sentence-compositions.json')
-    compositions = {
-        row['Sentence']: [
+    rows = data.read_jsonl('sentences', 'sentence-compositions.json')
+    compositions = ComponentLists(
+        (row['Sentence'], [
             (component, classify(component) or 'sentence-component')
             for component in row['Composition']
-        ]
+        ])
         for row in rows
-    }
+    )
     logger.info('loaded sentence compositions')
     return compositions
 
@@ -80,24 +105,20 @@ def load_compositions():
 @cache
 def count_progression_components():
     logger.info('counting sentence progression components ...')
-    counts = {}
-    for progression in load_progressions().values():
-        for component in progression:
-            counts.setdefault(component, 0)
-            counts[component] += 1
-    counts = dict(sorted(counts.items(), key=lambda c: -1 * c[1]))
+    counts = load_progressions().count()
     logger.info('counted sentence progression components')
     return counts
 
 
 @cache
+@data.snapshot(
+    'sentence-progressions',
+    ('sentences', 'sentence-progressions.json'))
 def load_progressions():
     logger.info('loading sentence progressions ...')
-    rows = data.read_json('sentences', 'sentence-progressions.json')
-    progressions = {
-        row['Sentence']: [tuple(c) for c in row['Progression']]
-        for row in rows
-    }
+    rows = data.read_jsonl('sentences', 'sentence-progressions.json')
+    progressions = ComponentLists(
+        (row['Sentence'], map(tuple, row['Progression'])) for row in rows)
     logger.info('loaded sentence progressions')
     return progressions
 
@@ -0,0 +1,66 @@
+import re
+from collections.abc import Mapping
+
+
+field_pattern = re.compile('\x00([A-Za-z]+)\x00')
+
+
+def create_field(name):
+    return '\x00{}\x00'.format(name)
+
+
+class Placeholders(Mapping):
+    """
+    Fields that render as markers, so that a layout built with the HTML helpers
+    can be compiled into a template.
+    """
+
+    def __getitem__(self, name):
+        return create_field(name)
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+
+placeholders = Placeholders()
+
+
+class Template:
+    """
+    HTML compiled from a layout into static chunks and named fields.
+    """
+
+    def __init__(self, html):
+        parts = field_pattern.split(html)
+        self.chunks = parts[0::2]
+        self.fields = parts[1::2]
+        self.format_string = ''.join(
+            chunk.replace('{', '{{').replace('}', '}}')
+            if i % 2 == 0 else '{{{}}}'.format(chunk)
+            for i, chunk in enumerate(parts)
+        )
+
+    def render(self, fields):
+        # (format_map() would render a missing value as 'nan' or 'None')
+        for name in self.fields:
+            if not isinstance(fields[name], str):
+                raise ValueError('field {} must be a string, not {!r}'.format(
+                    name, fields[name]))
+        return self.format_string.format_map(fields)
+
+    def render_columns(self, columns):
+        # columns (e.g. of a data frame) are concatenated element-wise, so a
+        # whole batch of cards is rendered with one operation per chunk
+        html = self.chunks[0]
+        for name, chunk in zip(self.fields, self.chunks[1:]):
+            if columns[name].isna().any():
+                raise ValueError('field {} has missing values'.format(name))
+            html = html + columns[name] + chunk
+        return html
+
+
+def compile_layout(layout):
+    return tuple(Template(html) for html in layout(placeholders))
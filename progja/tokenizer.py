@@ -1,12 +1,36 @@
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from functools import cache, partial
+from importlib import metadata
 from sudachipy import Dictionary, SplitMode
 
 
 tokenizer = Dictionary().create()
 
+dictionary_packages = (
+    'sudachipy', 'sudachidict_core', 'sudachidict_small', 'sudachidict_full')
+max_cache_size = 512 * 1024 * 1024
+
 
 def decompose(value):
+    return compose(tokenize(value))
+
+
+def decompose_many(values, jobs=1, cache_path=None):
+    return [
+        compose(tokens)
+        for tokens in tokenize_many(values, jobs=jobs, cache_path=cache_path)
+    ]
+
+
+def compose(tokens):
     composition = dict()
-    for token_min in tokenize(value):
+    for token_min in tokens:
         # add components with maximum segmentation
         for token_max in token_min['Tokens']:
             composition[token_max['Lemma']] = None
@@ -28,6 +52,123 @@ def tokenize(value, segmentation=1):
     return tokens
 
 
+def tokenize_many(
+        values, segmentation=1, jobs=1, chunk_size=1000, cache_path=None):
+    # validate the segmentation before starting any workers
+    get_split_mode(segmentation)
+    values = list(values)
+    if cache_path:
+        with closing(open_cache(cache_path)) as connection:
+            tokens = read_cache(connection, values, segmentation)
+            missing = [v for v in dict.fromkeys(values) if v not in tokens]
+            missing_tokens = tokenize_all(
+                missing, segmentation, jobs, chunk_size)
+            tokens.update(zip(missing, missing_tokens))
+            write_cache(connection, missing, missing_tokens, segmentation)
+    else:
+        unique = list(dict.fromkeys(values))
+        tokens = dict(zip(
+            unique,
+            tokenize_all(unique, segmentation, jobs, chunk_size)))
+    return [tokens[value] for value in values]
+
+
+def tokenize_all(values, segmentation=1, jobs=1, chunk_size=1000):
+    if jobs <= 1 or not values:
+        return [tokenize(value, segmentation) for value in values]
+    # each worker process loads its own copy of the Sudachi dictionary
+    with ProcessPoolExecutor(jobs, initializer=create_tokenizer) as executor:
+        return list(executor.map(
+            partial(tokenize, segmentation=segmentation),
+            values,
+            chunksize=chunk_size))
+
+
+def create_tokenizer():
+    global tokenizer
+    tokenizer = Dictionary().create()
+
+
+def open_cache(path):
+    connection = sqlite3.connect(path)
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS tokens ('
+        'key BLOB PRIMARY KEY, value BLOB, size INTEGER, accessed INTEGER)')
+    connection.execute(
+        'CREATE INDEX IF NOT EXISTS tokens_accessed ON tokens (accessed)')
+    return connection
+
+
+def read_cache(connection, values, segmentation=1):
+    keys = {cache_key(value, segmentation): value for value in values}
+    batch = list(keys)
+    tokens = {}
+    hits = []
+    for i in range(0, len(batch), 500):
+        chunk = batch[i:i + 500]
+        query = 'SELECT key, value FROM tokens WHERE key IN ({})'.format(
+            ', '.join('?' * len(chunk)))
+        for key, value in connection.execute(query, chunk):
+            tokens[keys[key]] = json.loads(zlib.decompress(value))
+            hits.append(key)
+    # mark the hits as recently used
+    accessed = time.time_ns()
+    with connection:
+        connection.executemany(
+            'UPDATE tokens SET accessed = ? WHERE key = ?',
+            [(accessed, key) for key in hits])
+    return tokens
+
+
+def write_cache(connection, values, tokens, segmentation=1):
+    accessed = time.time_ns()
+    rows = []
+    for value, value_tokens in zip(values, tokens):
+        key = cache_key(value, segmentation)
+        data = json.dumps(value_tokens, ensure_ascii=False).encode()
+        data = zlib.compress(data)
+        rows.append((key, data, len(key) + len(data), accessed))
+    with connection:
+        connection.executemany(
+            'INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?)', rows)
+    evict_cache(connection)
+
+
+def evict_cache(connection, max_size=None):
+    max_size = max_size or max_cache_size
+    query = 'SELECT COALESCE(SUM(size), 0) FROM tokens'
+    size = connection.execute(query).fetchone()[0]
+    if size <= max_size:
+        return
+    # evict the least recently used entries until the cache is 90% full
+    query = 'SELECT key, size FROM tokens ORDER BY accessed'
+    evicted = []
+    for key, entry_size in connection.execute(query):
+        if size <= max_size * 0.9:
+            break
+        evicted.append((key,))
+        size -= entry_size
+    with connection:
+        connection.executemany('DELETE FROM tokens WHERE key = ?', evicted)
+    connection.execute('VACUUM')
+
+
+def cache_key(value, segmentation=1):
+    key = '\0'.join([get_dictionary_version(), str(segmentation), value])
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+
+@cache
+def get_dictionary_version():
+    versions = []
+    for package in dictionary_packages:
+        try:
+            versions.append('{}={}'.format(package, metadata.version(package)))
+        except metadata.PackageNotFoundError:
+            pass
+    return ' '.join(versions)
+
+
 def morpheme_to_token(morpheme):
     return {
         'Surface': morpheme.surface(),
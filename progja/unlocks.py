@@ -0,0 +1,176 @@
+import logging
+from collections.abc import Mapping
+from functools import cache
+import numpy as np
+from . import kanji, words, sentences
+from .components import lookup, registry
+
+
+logger = logging.getLogger(__name__)
+
+
+class Dependents(Mapping):
+    """
+    A reverse index of progressions: a read-only mapping of each component to
+    the roots (e.g. kanji, words or sentences) whose progressions depend on
+    it, stored as one flat array of root positions per component.
+    """
+
+    def __init__(self, progressions):
+        self.roots = list(progressions)
+        offsets = np.asarray(progressions.offsets, dtype=np.int64)
+        ids = np.asarray(progressions.ids, dtype=np.int64)
+        if progressions.remap is not None:
+            ids = np.asarray(progressions.remap, dtype=np.int64)[ids]
+        lengths = np.diff(offsets)
+        rows = np.repeat(np.arange(len(self.roots)), lengths)
+        # the last component of a progression is its root, which isn't a
+        # dependency of the root
+        is_root = np.zeros(len(ids), dtype=bool)
+        is_root[offsets[1:][lengths > 0] - 1] = True
+        ids, rows = ids[~is_root], rows[~is_root]
+        order = np.lexsort((rows, ids))
+        ids, rows = ids[order], rows[order]
+        unique = np.ones(len(ids), dtype=bool)
+        unique[1:] = (ids[1:] != ids[:-1]) | (rows[1:] != rows[:-1])
+        ids, rows = ids[unique], rows[unique]
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) \
+            if len(ids) else np.empty(0, dtype=np.int64)
+        ends = np.r_[starts[1:], len(ids)]
+        self.rows = rows
+        self.index = {
+            component_id: (start, end)
+            for component_id, start, end in zip(
+                ids[starts].tolist(), starts.tolist(), ends.tolist())
+        }
+        # the number of (unique) dependencies of each root
+        self.counts = np.bincount(rows, minlength=len(self.roots))
+
+    def __getitem__(self, component):
+        # components are looked up without interning them, so that queries
+        # for unknown components don't grow the component table
+        component_id = registry.get(component)
+        if component_id not in self.index:
+            raise KeyError(component)
+        return [self.roots[row] for row in self.rows_of(component_id)]
+
+    def __iter__(self):
+        return (lookup(component_id) for component_id in self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, component):
+        return registry.get(component) in self.index
+
+    def rows_of(self, component_id):
+        start, end = self.index.get(component_id, (0, 0))
+        return self.rows[start:end]
+
+    def count(self, component):
+        start, end = self.index.get(registry.get(component), (0, 0))
+        return end - start
+
+    def expand(self, ids):
+        """
+        Returns the rows of the roots that depend on each of the given component
+        IDs, and the position (in ids) of the component of each row.
+        """
+        spans = np.array(
+            [self.index.get(component_id, (0, 0)) for component_id in ids],
+            dtype=np.int64
+        ).reshape(-1, 2)
+        lengths = spans[:, 1] - spans[:, 0]
+        positions = np.repeat(np.arange(len(spans)), lengths)
+        offsets = np.repeat(spans[:, 0] - np.cumsum(lengths) + lengths, lengths)
+        return self.rows[offsets + np.arange(len(offsets))], positions
+
+    def find_unlocked(self, path, known=()):
+        """
+        Returns the roots that are unlocked by a path (a list of component IDs),
+        i.e. whose dependencies are all on the path or known, mapped to the
+        position of the last of their dependencies on the path.
+        """
+        # a component that is on the path more than once only counts once,
+        # at its last position
+        last_positions = {
+            component_id: position
+            for position, component_id in enumerate(path)
+        }
+        path_rows, path_indexes = self.expand(list(last_positions))
+        path_positions = np.array(
+            list(last_positions.values()), dtype=np.int64)[path_indexes]
+        known_rows, _ = self.expand(set(known).difference(last_positions))
+        unlocked_at = np.full(len(self.roots), -1, dtype=np.int64)
+        np.maximum.at(unlocked_at, path_rows, path_positions)
+        satisfied = np.bincount(path_rows, minlength=len(self.roots)) \
+            + np.bincount(known_rows, minlength=len(self.roots))
+        rows = np.flatnonzero((satisfied == self.counts) & (unlocked_at >= 0))
+        return {
+            self.roots[row]: position
+            for row, position in zip(rows.tolist(), unlocked_at[rows].tolist())
+        }
+
+
+@cache
+def load_kanji_dependents():
+    logger.info('indexing kanji dependents ...')
+    dependents = Dependents(kanji.load_progressions())
+    logger.info('indexed kanji dependents')
+    return dependents
+
+
+@cache
+def load_word_dependents():
+    logger.info('indexing word dependents ...')
+    dependents = Dependents(words.load_progressions())
+    logger.info('indexed word dependents')
+    return dependents
+
+
+@cache
+def load_sentence_dependents():
+    logger.info('indexing sentence dependents ...')
+    dependents = Dependents(sentences.load_progressions())
+    logger.info('indexed sentence dependents')
+    return dependents
+
+
+def load_dependents():
+    return {
+        'kanji': load_kanji_dependents(),
+        'word': load_word_dependents(),
+        'sentence': load_sentence_dependents()
+    }
+
+
+def find_dependents(component):
+    """
+    Returns the kanji, words and sentences whose progressions contain a
+    component.
+    """
+    return {
+        root_type: dependents.get(component, [])
+        for root_type, dependents in load_dependents().items()
+    }
+
+
+def count_dependents(component):
+    return {
+        root_type: dependents.count(component)
+        for root_type, dependents in load_dependents().items()
+    }
+
+
+def find_unlocked(component, known=()):
+    """
+    Returns the kanji, words and sentences that learning a component unlocks,
+    i.e. the dependents whose other dependencies are all known.
+    """
+    # components that were never interned aren't part of any progression
+    path = [registry[component]] if component in registry else []
+    known = [registry[c] for c in known if c in registry]
+    return {
+        root_type: list(dependents.find_unlocked(path, known))
+        for root_type, dependents in load_dependents().items()
+    }
@@ -2,12 +2,46 @@ import csv
 import logging
 from functools import cache
 from random import randint
+import numpy as np
 import pandas as pd
 from . import data, kanji
+from .components import ComponentLists
 
 
 logger = logging.getLogger(__name__)
 
+# compact dtypes for the word data, with categoricals for columns that only
+# have a few distinct values
+word_dtypes = {
+    'Sequence': 'int32',
+    'Length': 'int16',
+    'Priority': 'category',
+    'PriorityReading': 'category',
+    'PriorityNF': 'int8',
+    'PriorityIchi': 'int8',
+    'PriorityNews': 'int8',
+    'PrioritySpec': 'int8',
+    'PriorityGai': 'int8',
+    'IsCommon': 'bool',
+    'IsFalseReading': 'bool',
+    'IsUsuallyKana': 'bool',
+    'IsSometimesKana': 'bool',
+    'Info': 'category',
+    'InfoReading': 'category'
+}
+definition_dtypes = {
+    'Sequence': 'int32',
+    'Index': 'int16',
+    'PartOfSpeech': 'category',
+    'Field': 'category',
+    'Dialect': 'category',
+    'IsUsuallyKana': 'bool',
+    'Sources': 'category',
+    'Miscellaneous': 'category',
+    'SourceTypes': 'str',
+    'SourceWaseigo': 'str'
+}
+
 
 def random(common=False, uncommon=False):
     df = (
@@ -32,37 +66,140 @@ def find_common(word=None, reading=None):
 
 
 def find(word=None, reading=None, common=None):
-    df1 = load_common() if common else load()
-    df2 = load_common_sometimes_kana() if common else load_sometimes_kana()
     df3 = load_common_definitions() if common else load_definitions()
+    index = load_common_index() if common else load_index()
     compositions = load_compositions()
     progressions = load_progressions()
-    df4 = df1
-    if word:
-        df4 = df4[df1['Word'] == word]
-        if len(df4) == 0:
-            df4 = df2[df2['Reading'] == word]
-    if reading:
-        df4 = df4[df4['Reading'] == reading]
-    records = df4.to_dict('records')
+    df4, positions = locate(word, reading, common)
+    records = data.select_rows(df4, positions).to_dict('records')
     for record in records:
-        df5 = df3[df3['Word'] == record['Word']]
-        df5 = df5[df5['Reading'] == record['Reading']]
+        key = (record['Word'], record['Reading'])
+        df5 = data.select_rows(df3, index['Definitions'].get(key))
         record['Definitions'] = df5.to_dict('records')
         record['Composition'] = compositions.get(record['Word'], [])
         record['Progression'] = progressions.get(record['Word'], [])
     return records
 
 
+def locate_common_or_any(word=None, reading=None):
+    """
+    Returns the data frame and the positions of the rows that
+    find_common_or_any() returns records for, and the name of their source:
+    ('common' or 'uncommon', 'words' or 'sometimes_kana').
+    """
+    frame, df, positions = _locate(word, reading, True)
+    if positions is not None and len(positions):
+        return df, positions, ('common', frame)
+    frame, df, positions = _locate(word, reading, False)
+    return df, positions, ('uncommon', frame)
+
+
+def locate(word=None, reading=None, common=None):
+    """
+    Returns the data frame and the positions of the rows that find() returns
+    records for.
+    """
+    frame, df, positions = _locate(word, reading, common)
+    return df, positions
+
+
+def _locate(word, reading, common):
+    df1 = load_common() if common else load()
+    df2 = load_common_sometimes_kana() if common else load_sometimes_kana()
+    index = load_common_index() if common else load_index()
+    if word:
+        if word in index['Word']:
+            positions = (
+                index['WordReading'].get((word, reading)) if reading
+                else index['Word'][word]
+            )
+            return 'words', df1, positions
+        # (every row found by reading has the same reading as the word)
+        positions = (
+            index['SometimesKanaReading'].get(word)
+            if not reading or reading == word
+            else None
+        )
+        return 'sometimes_kana', df2, positions
+    if reading:
+        return 'words', df1, index['Reading'].get(reading)
+    return 'words', df1, list(range(len(df1)))
+
+
+def load_columns(columns, common=None):
+    """
+    Returns some columns of the words (e.g. ['Word', 'Reading']), in no
+    particular order. Unless the words have already been loaded, only those
+    columns are read, and the uncommon words are only read if common is not
+    True.
+    """
+    return _load_columns(tuple(columns), bool(common))
+
+
+@cache
+def _load_columns(columns, common):
+    loaded = load_common if common else load
+    if loaded.cache_info().currsize:
+        return loaded()[list(columns)]
+    logger.info('loading word columns {} ...'.format(', '.join(columns)))
+    filenames = ['words-common.csv']
+    if not common:
+        filenames.append('words-uncommon.csv')
+    df = pd.concat([
+        data.read_csv(
+            'words', filename, dtypes=word_dtypes, columns=list(columns))
+        for filename in filenames
+    ], ignore_index=True)
+    df = restore_categories(df, word_dtypes)
+    logger.info('loaded word columns {}'.format(', '.join(columns)))
+    return df
+
+
+def restore_categories(df, dtypes):
+    # concatenating categoricals with different categories creates strings
+    return df.astype({
+        column: dtype
+        for column, dtype in dtypes.items()
+        if dtype == 'category' and column in df
+    })
+
+
+@cache
+def load_index():
+    logger.info('indexing words ...')
+    index = build_index(load(), load_sometimes_kana(), load_definitions())
+    logger.info('indexed words')
+    return index
+
+
+@cache
+def load_common_index():
+    logger.info('indexing common words ...')
+    index = build_index(
+        load_common(),
+        load_common_sometimes_kana(),
+        load_common_definitions())
+    logger.info('indexed common words')
+    return index
+
+
+def build_index(words, sometimes_kana, definitions):
+    return {
+        'Word': data.index_rows(words, 'Word'),
+        'WordReading': data.index_rows(words, 'Word', 'Reading'),
+        'Reading': data.index_rows(words, 'Reading'),
+        'SometimesKanaReading': data.index_rows(sometimes_kana, 'Reading'),
+        'Definitions': data.index_rows(definitions, 'Word', 'Reading')
+    }
+
+
 @cache
 def load_sometimes_kana():
     logger.info('loading words sometimes written in kana ...')
-    df = pd.concat([
-            load_common_sometimes_kana(),
-            load_uncommon_sometimes_kana()
-        ]) \
-        .sort_values(['Word', 'Reading']) \
-        .reset_index(drop=True)
+    df = data.merge_sorted([
+        load_common_sometimes_kana(),
+        load_uncommon_sometimes_kana()
+    ], ['Word', 'Reading'])
     logger.info('loaded words sometimes written in kana')
     return df
 
@@ -70,10 +207,8 @@ def load_sometimes_kana():
 @cache
 def load_common_sometimes_kana():
     logger.info('loading common words sometimes written in kana ...')
-    df = load_common()
-    df = df[df['IsSometimesKana']] \
-        .sort_values(['Word', 'Reading']) \
-        .reset_index(drop=True)
+    df = load_common_sorted()
+    df = df[df['IsSometimesKana']].reset_index(drop=True)
     logger.info('loaded common words sometimes written in kana')
     return df
 
@@ -81,48 +216,68 @@ def load_common_sometimes_kana():
 @cache
 def load_uncommon_sometimes_kana():
     logger.info('loading uncommon words sometimes written in kana ...')
+    # the uncommon words are already sorted by word and reading
     df = load_uncommon()
-    df = df[df['IsSometimesKana']] \
-        .sort_values(['Word', 'Reading']) \
-        .reset_index(drop=True)
+    df = df[df['IsSometimesKana']].reset_index(drop=True)
     logger.info('loaded uncommon words sometimes written in kana')
     return df
 
 
 @cache
+@data.snapshot(
+    'words',
+    ('words', 'words-common.csv'),
+    ('words', 'words-uncommon.csv'))
 def load():
     logger.info('loading words ...')
-    df = pd.concat([load_common(), load_uncommon()]) \
-        .sort_values(['Word', 'Reading']) \
-        .reset_index(drop=True)
+    df = data.merge_sorted(
+        [load_common_sorted(), load_uncommon()], ['Word', 'Reading'])
     logger.info('loaded words')
     return df
 
 
 @cache
+def load_common_sorted():
+    logger.info('sorting common words ...')
+    # the common words sorted by word and reading, rather than by priority
+    df = load_common()
+    order = np.lexsort([df['Reading'].to_numpy(), df['Word'].to_numpy()])
+    df = df.take(order).reset_index(drop=True)
+    logger.info('sorted common words')
+    return df
+
+
+@cache
+@data.snapshot('words-common', ('words', 'words-common.csv'))
 def load_common():
     logger.info('loading common words ...')
-    df = data.read_csv('words', 'words-common.csv')
-    copy = df.copy()
-    copy['_PriorityCount'] = (
-        (copy['PriorityNF'] > 0).astype(int)
-        + (copy['PriorityIchi'] > 0).astype(int)
-        + (copy['PriorityNews'] > 0).astype(int)
+    df = data.read_csv('words', 'words-common.csv', dtypes=word_dtypes)
+    # the sort keys are computed separately, rather than added to a copy
+    priority_count = (
+        (df['PriorityNF'] > 0).astype(int)
+        + (df['PriorityIchi'] > 0).astype(int)
+        + (df['PriorityNews'] > 0).astype(int)
     )
-    sort_by = [
-        '_PriorityCount', 'PriorityNF', 'PriorityIchi', 'PriorityNews', 'Word',
-        'Reading']
-    sort_ascending = [0, 1, 1, 1, 1, 1]
-    sort_index = copy.sort_values(sort_by, ascending=sort_ascending).index
-    df = df.reindex(sort_index).reset_index(drop=True)
+    # sorted by descending priority count, then the priorities, word and
+    # reading (lexsort sorts by the last key first)
+    order = np.lexsort([
+        df['Reading'].to_numpy(),
+        df['Word'].to_numpy(),
+        df['PriorityNews'].to_numpy(),
+        df['PriorityIchi'].to_numpy(),
+        df['PriorityNF'].to_numpy(),
+        -priority_count.to_numpy()
+    ])
+    df = df.take(order).reset_index(drop=True)
     logger.info('loaded common words')
     return df
 
 
 @cache
+@data.snapshot('words-uncommon', ('words', 'words-uncommon.csv'))
 def load_uncommon():
     logger.info('loading uncommon words ...')
-    df = data.read_csv('words', 'words-uncommon.csv') \
+    df = data.read_csv('words', 'words-uncommon.csv', dtypes=word_dtypes) \
         .sort_values(['Word', 'Reading']) \
         .reset_index(drop=True)
     logger.info('loaded uncommon words')
@@ -130,20 +285,26 @@ def load_uncommon():
 
 
 @cache
+@data.snapshot(
+    'word-definitions',
+    ('words', 'word-definitions-common.csv'),
+    ('words', 'word-definitions-uncommon.csv'))
 def load_definitions():
     logger.info('loading word definitions ...')
-    df = pd.concat([load_common_definitions(), load_uncommon_definitions()]) \
-        .sort_values(['Word', 'Reading', 'Index']) \
-        .reset_index(drop=True)
+    df = data.merge_sorted(
+        [load_common_definitions(), load_uncommon_definitions()],
+        ['Word', 'Reading', 'Index'])
     logger.info('loaded word definitions')
     return df
 
 
 @cache
+@data.snapshot(
+    'word-definitions-common', ('words', 'word-definitions-common.csv'))
 def load_common_definitions():
     logger.info('loading common word definitions ...')
-    dtypes = {'SourceTypes': 'str', 'SourceWaseigo': 'str'}
-    df = data.read_csv('words', 'word-definitions-common.csv', dtypes=dtypes) \
+    path = ('words', 'word-definitions-common.csv')
+    df = data.read_csv(*path, dtypes=definition_dtypes) \
         .sort_values(['Word', 'Reading', 'Index']) \
         .reset_index(drop=True)
     logger.info('loaded common word definitions')
@@ -151,11 +312,13 @@ def load_common_definitions():
 
 
 @cache
+@data.snapshot(
+    'word-definitions-uncommon',
+    ('words', 'word-definitions-uncommon.csv'))
 def load_uncommon_definitions():
     logger.info('loading uncommon word definitions ...')
     path = ('words', 'word-definitions-uncommon.csv')
-    dtypes = {'SourceTypes': 'str', 'SourceWaseigo': 'str'}
-    df = data.read_csv(*path, dtypes=dtypes) \
+    df = data.read_csv(*path, dtypes=definition_dtypes) \
         .sort_values(['Word', 'Reading', 'Index']) \
         .reset_index(drop=True)
     logger.info('loaded uncommon word definitions')
@@ -165,28 +328,28 @@ def load_uncommon_definitions():
 @cache
 def count_components():
     logger.info('counting word components ...')
-    counts = {}
-    for composition in load_compositions().values():
-        for component in composition:
-            counts.setdefault(component, 0)
-            counts[component] += 1
-    counts = dict(sorted(counts.items(), key=lambda c: -1 * c[1]))
+    counts = load_compositions().count()
     logger.info('counted word components')
     return counts
 
 
 @cache
+@data.snapshot(
+    'word-compositions',
+    ('words', 'word-compositions.json'),
+    ('words', 'words-common.csv'),
+    ('words', 'words-uncommon.csv'))
 def load_compositions():
     logger.info('loading word compositions')
     classify = component_classifier()
-    rows = data.read_json('words', 'word-compositions.json')
-    compositions = {
-        row['Word']: [
+    rows = data.read_jsonl('words', 'word-compositions.json')
+    compositions = ComponentLists(
+        (row['Word'], [
             (component, classify(component) or 'word-component')
             for component in row['Composition']
-        ]
+        ])
         for row in rows
-    }
+    )
     logger.info('loaded word compositions')
     return compositions
 
@@ -194,24 +357,18 @@ def load_compositions():
 @cache
 def count_progression_components():
     logger.info('counting word progression components ...')
-    counts = {}
-    for progression in load_progressions().values():
-        for component in progression:
-            counts.setdefault(component, 0)
-            counts[component] += 1
-    counts = dict(sorted(counts.items(), key=lambda c: -1 * c[1]))
+    counts = load_progressions().count()
     logger.info('counted word progression components')
     return counts
 
 
 @cache
+@data.snapshot('word-progressions', ('words', 'word-progressions.json'))
 def load_progressions():
     logger.info('loading word progressions ...')
-    rows = data.read_json('words', 'word-progressions.json')
-    progressions = {
-        row['Word']: [tuple(c) for c in row['Progression']]
-        for row in rows
-    }
+    rows = data.read_jsonl('words', 'word-progressions.json')
+    progressions = ComponentLists(
+        (row['Word'], map(tuple, row['Progression'])) for row in rows)
     logger.info('loaded word progressions')
     return progressions
 
@@ -265,10 +422,13 @@ def progression_builder(compositions, kanji_progressions=None):
 
 
 def component_classifier(words=None, readings=None):
+    if not words or not readings:
+        df = load_columns(['Word', 'Reading', 'IsSometimesKana'])
     if not words:
-        words = set(load()['Word']).union(load_sometimes_kana()['Reading'])
+        sometimes_kana = df[df['IsSometimesKana']]
+        words = set(df['Word']).union(sometimes_kana['Reading'])
     if not readings:
-        readings = set(load()['Reading'])
+        readings = set(df['Reading'])
 
     def classify(text):
         component_type = None
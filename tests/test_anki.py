@@ -0,0 +1,45 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import zipfile
+import progja
+
+
+class TestAnki(unittest.TestCase):
+
+    def setUp(self):
+        self.cards = [
+            {'ID': 'progja:kanji:日', 'Front': '日', 'Back': 'day', 'Tags': 'a'},
+            {'ID': 'progja:kanji:本', 'Front': '本', 'Back': 'book', 'Tags': ''},
+            {'ID': 'progja:kanji:日', 'Front': '日', 'Back': 'sun', 'Tags': 'b'}
+        ]
+
+    def test_write_package(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'deck.apkg')
+            count = progja.anki.write_package(self.cards, path, 'Deck')
+            with zipfile.ZipFile(path) as file:
+                file.extract('collection.anki2', directory)
+            connection = sqlite3.connect(
+                os.path.join(directory, 'collection.anki2'))
+            rows = connection.execute(
+                'SELECT notes.flds, notes.tags, notes.guid FROM cards '
+                'JOIN notes ON notes.id = cards.nid ORDER BY cards.due'
+            ).fetchall()
+            connection.close()
+        self.assertEqual(count, 2)
+        self.assertEqual(rows, [
+            ('progja:kanji:日\x1f日\x1fsun', ' b ',
+                progja.anki.create_guid('progja:kanji:日')),
+            ('progja:kanji:本\x1f本\x1fbook', '',
+                progja.anki.create_guid('progja:kanji:本'))
+        ])
+
+    def test_guids_are_stable(self):
+        self.assertEqual(
+            progja.anki.create_guid('progja:word:1000000'),
+            progja.anki.create_guid('progja:word:1000000'))
+        self.assertNotEqual(
+            progja.anki.create_guid('progja:word:1000000'),
+            progja.anki.create_guid('progja:word:1000001'))
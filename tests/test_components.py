@@ -0,0 +1,71 @@
+import os
+import pickle
+import tempfile
+import unittest
+import progja
+
+
+class TestComponentLists(unittest.TestCase):
+
+    def setUp(self):
+        self.lists = {
+            '日本': [('日', 'kanji'), ('本', 'kanji'), ('日本', 'word')],
+            '本': [('本', 'kanji')],
+            '': [],
+        }
+
+    def test_view_matches_lists(self):
+        components = progja.components.ComponentLists(self.lists)
+        self.assertEqual(components, self.lists)
+        self.assertEqual(list(components), list(self.lists))
+
+    def test_components_are_interned(self):
+        components = progja.components.ComponentLists(self.lists)
+        self.assertEqual(
+            components.ids_of('日本')[1], components.ids_of('本')[0])
+
+    def test_counts_are_sorted(self):
+        components = progja.components.ComponentLists(self.lists)
+        counts = components.count()
+        self.assertEqual(list(counts.items())[0], (('本', 'kanji'), 2))
+
+    def test_pickle_remaps_ids(self):
+        components = progja.components.ComponentLists(self.lists)
+        data = pickle.dumps(components)
+        table = progja.components.table
+        registry = progja.components.registry
+        try:
+            progja.components.table = [('_', 'radical')]
+            progja.components.registry = {('_', 'radical'): 0}
+            self.assertEqual(pickle.loads(data), self.lists)
+        finally:
+            progja.components.table = table
+            progja.components.registry = registry
+
+    def test_binary_round_trip(self):
+        components = progja.components.ComponentLists(self.lists)
+        signature = {'version': 1, 'sources': [('a', 1, 2)]}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lists.bin')
+            with open(path, 'wb') as file:
+                progja.data.write_component_lists(file, components, signature)
+            loaded = progja.data.read_component_lists(path, signature)
+            self.assertEqual(loaded, self.lists)
+            self.assertIsNone(progja.data.read_component_lists(path, {}))
+
+    def test_invalid_binary_is_ignored(self):
+        components = progja.components.ComponentLists(self.lists)
+        signature = {'version': 1, 'sources': [('a', 1, 2)]}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lists.bin')
+            with open(path, 'wb') as file:
+                progja.data.write_component_lists(file, components, signature)
+            with open(path, 'rb') as file:
+                contents = file.read()
+            for length in (0, 2, 6, 20, len(contents) - 4):
+                with open(path, 'wb') as file:
+                    file.write(contents[:length])
+                message = 'file truncated to {} bytes'.format(length)
+                self.assertIsNone(
+                    progja.data.read_component_lists(path, signature),
+                    message)
@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+import pandas as pd
+import progja
+
+
+class TestJsonLines(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = progja.data.path_builder(self.directory.name)
+        self.write = progja.data.jsonl_writer(self.path)
+        self.read = progja.data.jsonl_reader(self.path)
+        self.rows = [
+            {'Key': '日本', 'Components': [['日', 'kanji'], ['本', 'kanji']]},
+            *({'Key': str(i), 'Components': []} for i in range(1000))
+        ]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_json_round_trip(self):
+        self.write(iter(self.rows), 'rows.json')
+        self.assertEqual(list(self.read('rows.json')), self.rows)
+        with open(self.path('rows.json')) as file:
+            self.assertEqual(json.load(file), self.rows)
+
+    def test_json_lines_round_trip(self):
+        for name in ('rows.jsonl', 'rows.jsonl.gz'):
+            self.write(iter(self.rows), name)
+            self.assertEqual(list(self.read(name)), self.rows)
+
+    def test_json_lines_format(self):
+        self.write(iter(self.rows[:2]), 'rows.jsonl')
+        with open(self.path('rows.jsonl')) as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual(lines, self.rows[:2])
+
+    def test_empty_round_trip(self):
+        for name in ('rows.json', 'rows.jsonl'):
+            self.write([], name)
+            self.assertEqual(list(self.read(name)), [])
+        self.assertFalse(os.path.exists(self.path('rows.json.tmp')))
+
+    def test_read_across_chunks(self):
+        size = progja.data.json_chunk_size
+        rows = [{'Key': 'x' * (size // 3)} for _ in range(7)] + [12345]
+        for name in ('rows.json', 'rows.jsonl'):
+            self.write(rows, name)
+            self.assertEqual(list(self.read(name)), rows)
+
+    def test_write_rejects_non_row_iterables(self):
+        components = progja.components.ComponentLists({'日': []})
+        for data in ('rows', b'rows', {'Key': '日本'}, components):
+            with self.assertRaises(ValueError):
+                self.write(data, 'rows.json')
+
+    def test_nested_array_round_trip(self):
+        rows = [[1, 2], [3], [], [['日', 'kanji']]]
+        for name in ('rows.json', 'rows.jsonl', 'rows.jsonl.gz'):
+            self.write(rows, name)
+            self.assertEqual(list(self.read(name)), rows)
+
+
+class TestMergeSorted(unittest.TestCase):
+
+    def test_merge_sorted_matches_sort(self):
+        frames = [
+            pd.DataFrame({
+                'Word': ['a', 'a', 'b', 'c'],
+                'Index': [2, 2, 1, 1],
+                'Tag': pd.Categorical(['y', 'z', 'x', 'x'])
+            }),
+            pd.DataFrame({
+                'Word': ['a', 'b', 'd'],
+                'Index': [2, 0, 1],
+                'Tag': pd.Categorical(['w', 'x', 'x'])
+            })
+        ]
+        merged = progja.data.merge_sorted(frames, ['Word', 'Index'])
+        expected = pd.concat(frames, ignore_index=True) \
+            .sort_values(['Word', 'Index'], kind='stable') \
+            .astype({'Tag': 'category'})
+        pd.testing.assert_frame_equal(
+            merged, expected.reset_index(drop=True))
+        # equal rows keep the order of the frames
+        self.assertEqual(merged['Tag'][:3].tolist(), ['y', 'z', 'w'])
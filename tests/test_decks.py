@@ -1,4 +1,5 @@
 import unittest
+import pandas as pd
 import progja
 
 
@@ -35,3 +36,72 @@ class TestDecks(unittest.TestCase):
         ])
         actual = progja.decks.create_sentence_reading(reading)
         self.assertEqual(actual, expected)
+
+    def test_create_progression_list(self):
+        progression = [('日', 'kanji'), ('日本', 'word')]
+        expected = ''.join([
+            '<ol class="">',
+            '<li class="">',
+            '<span class="component-text text-japanese">',
+            '<a href="https://jisho.org/search/%E6%97%A5%20%23kanji">日</a>',
+            '</span>',
+            ' (<span class="component-type">kanji</span>)',
+            '</li>',
+            '<li class="">',
+            '<span class="component-text text-japanese">',
+            '<a href="https://jisho.org/search/%E6%97%A5%E6%9C%AC">日本</a>',
+            '</span>',
+            ' (<span class="component-type">word</span>)',
+            '</li>',
+            '</ol>'
+        ])
+        for _ in range(2):
+            actual = progja.decks.create_progression_list(progression)
+            self.assertEqual(''.join(actual), expected)
+
+    def test_templates_match_layouts(self):
+        fields = {
+            'Subject': '<a href="#">日</a>',
+            'Notes': '(JLPT N5)',
+            'Meaning': 'day, {sun}',
+            'Composition': '(none)',
+            'Reading': 'にち',
+            'Definition': '<ol class=""></ol>',
+            'Translations': '<ul class=""></ul>',
+            'Progression': '<ol class=""></ol>'
+        }
+        templates = progja.decks.load_card_templates()
+        for card_type, layout in progja.decks.card_layouts.items():
+            expected = layout(fields)
+            actual = tuple(t.render(fields) for t in templates[card_type])
+            self.assertEqual(actual, expected)
+
+    def test_create_batch_cards_matches_create_cards(self):
+        components = [
+            ('一', 'kanji'),
+            ('丶', 'radical'),
+            ('一つ', 'word'),
+            ('ある', 'word'),
+            ('彼はいないだろう。', 'sentence'),
+            ('つ', 'word'),
+            ('1', 'word-component')
+        ]
+        expected = [progja.decks.create_cards(c) for c in components]
+        actual = progja.decks.create_batch_cards(components)
+        self.assertEqual(actual, expected)
+        self.assertTrue(all(actual[:5]))
+
+    def test_card_rows_are_keyed_by_source(self):
+        key, df, positions = progja.decks.locate_card_rows(('一つ', 'word'))
+        self.assertEqual(key, ('word', 'common', 'words'))
+        self.assertIs(df, progja.words.load_common())
+        key, df, positions = progja.decks.locate_card_rows(('一', 'kanji'))
+        self.assertEqual(key, ('kanji', None, 'kanji'))
+
+    def test_templates_reject_missing_values(self):
+        template = progja.decks.load_fragment_templates()['japanese']
+        for value in (None, float('nan')):
+            with self.assertRaises(ValueError):
+                template.render({'Text': value})
+            with self.assertRaises(ValueError):
+                template.render_columns({'Text': pd.Series(['日', value])})
@@ -5,7 +5,54 @@ import progja
 
 class TestKanji(unittest.TestCase):
 
-    pass
+    def setUp(self):
+        self.df = progja.kanji.load()
+
+    def test_find_matches_scan(self):
+        for character in self.df['Kanji'][::100]:
+            expected = self.df[self.df['Kanji'] == character]
+            actual = progja.kanji.find(character)
+            message = '{} lookup does not match scan'.format(character)
+            self.assertEqual(
+                [r['Kanji'] for r in actual],
+                list(expected['Kanji']),
+                message)
+
+    def test_find_unknown_character_is_empty(self):
+        self.assertEqual(progja.kanji.find('a'), [])
+
+    def test_query_matches_scan(self):
+        df = self.df
+        queries = [
+            ({}, df['Kanji'].notna()),
+            ({'grade': 1}, df['Grade'] == 1),
+            ({'grade': (9, 10)}, df['Grade'].isin([9, 10])),
+            ({'jlpt': 2, 'radical': True}, (df['JLPT'] == 2) & df['IsRadical']),
+            ({'strokes': 5}, df['Strokes'] == 5),
+            ({'strokes': (3, 6)}, df['Strokes'].between(3, 6)),
+            ({'strokes': (None, 2)}, df['Strokes'] <= 2),
+            ({'strokes': [3, 5]}, df['Strokes'].between(3, 5)),
+            ({'grade': 42}, df['Grade'] == 42)
+        ]
+        for kwargs, mask in queries:
+            expected = df[mask.fillna(False).astype(bool)]
+            actual = progja.kanji.query(**kwargs)
+            message = '{} query does not match scan'.format(kwargs)
+            self.assertEqual(
+                list(actual['Kanji']), list(expected['Kanji']), message)
+
+    def test_query_rejects_invalid_range(self):
+        with self.assertRaises(ValueError):
+            progja.kanji.query(strokes=[3, 5, 7])
+
+    def test_query_contains_component(self):
+        compositions = progja.kanji.load_compositions()
+        actual = progja.kanji.query(contains_component='口', jouyou=True)
+        self.assertGreater(len(actual), 0)
+        for kanji, is_jouyou in zip(actual['Kanji'], actual['IsJouyou']):
+            roots = {c[0][0] for c in compositions[kanji]}
+            self.assertTrue(is_jouyou)
+            self.assertIn('口', roots, kanji)
 
 
 class TestKanjiCompositions(unittest.TestCase):
@@ -45,6 +92,14 @@ class TestKanjiProgressions(unittest.TestCase):
     def setUp(self):
         self.progressions = progja.kanji.load_progressions()
 
+    def test_builder_reproduces_progressions(self):
+        compositions = progja.kanji.load_compositions()
+        build_progression = progja.kanji.progression_builder(compositions)
+        for root, progression in self.progressions.items():
+            message = '{} progression does not match builder'.format(root)
+            actual = build_progression((root, 'kanji'))
+            self.assertEqual(actual, progression, message)
+
     def test_progression_contains_at_least_one_component(self):
         for root, progression in self.progressions.items():
             message = '{} progression is empty'.format(root)
@@ -0,0 +1,66 @@
+import unittest
+import progja
+
+
+class TestPersonalizedPaths(unittest.TestCase):
+
+    def setUp(self):
+        level = progja.paths.load_level(1)
+        self.known = set(zip(level['Component'], level['Type']))
+        progressions = progja.words.load_progressions()
+        self.words = [
+            word
+            for word in progja.words.load_common()['Word'][:3000]
+            if word in progressions
+        ]
+        components = list(progja.sentences.count_components())[:3000]
+        unknown = set(progja.paths.find_unknown_components(components))
+        self.components = [c for c in components if c not in unknown]
+
+    def test_path_contains_targets_and_progressions(self):
+        path = progja.paths.create_personalized_path([], ['日'], ['日本'])
+        self.assertEqual(
+            path, [('日', 'kanji'), ('本', 'kanji'), ('日本', 'word')])
+
+    def test_unknown_targets_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, '日本語日本語'):
+            progja.paths.create_personalized_path([], ['日'], ['日本語日本語'])
+        # known targets aren't added, so they don't need progressions
+        path = progja.paths.create_personalized_path(
+            [('日本語日本語', 'word')], ['日'], ['日本語日本語'])
+        self.assertEqual(path, [('日', 'kanji')])
+
+    def test_unknown_components_are_not_interned(self):
+        progja.paths.create_personalized_path([], ['日'], ['日本'])
+        size = len(progja.components.table)
+        known = [('未知の成分{}'.format(i), 'word') for i in range(100)]
+        path = progja.paths.create_personalized_path(
+            known, ['日'], ['日本'], [('未知の文', 'sentence')])
+        self.assertEqual(path, [
+            ('日', 'kanji'), ('本', 'kanji'), ('日本', 'word'),
+            ('未知の文', 'sentence')])
+        self.assertEqual(len(progja.components.table), size)
+
+    def test_path_excludes_known_components(self):
+        path = progja.paths.create_personalized_path(
+            self.known, [], self.words, self.components)
+        self.assertGreater(len(path), 0)
+        self.assertEqual(len(path), len(set(path)))
+        for component in path:
+            self.assertNotIn(component, self.known)
+
+    def test_sentences_follow_their_progressions(self):
+        path = progja.paths.create_personalized_path(
+            self.known, [], self.words, self.components)
+        progressions = progja.sentences.load_progressions()
+        positions = {component: i for i, component in enumerate(path)}
+        sentences = [c for c in path if c[1] == 'sentence']
+        self.assertGreater(len(sentences), 0)
+        for sentence in sentences:
+            for component in progressions[sentence[0]][:-1]:
+                message = '{} is not known before {}'.format(
+                    component, sentence[0])
+                self.assertTrue(
+                    component in self.known
+                    or positions[component] < positions[sentence],
+                    message)
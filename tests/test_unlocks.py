@@ -0,0 +1,68 @@
+import pickle
+import unittest
+import progja
+
+
+class TestDependents(unittest.TestCase):
+
+    def setUp(self):
+        self.progressions = progja.components.ComponentLists({
+            '日本': [('日', 'kanji'), ('本', 'kanji'), ('日本', 'word')],
+            '日日': [('日', 'kanji'), ('日', 'kanji'), ('日日', 'word')],
+            '本': [('本', 'word')],
+            '': [],
+        })
+        self.dependents = progja.unlocks.Dependents(self.progressions)
+        self.intern = progja.components.intern
+
+    def test_dependents_match_scan(self):
+        for component in [('日', 'kanji'), ('本', 'kanji'), ('本', 'word')]:
+            expected = [
+                key
+                for key, progression in self.progressions.items()
+                if component in progression[:-1]
+            ]
+            self.assertEqual(self.dependents.get(component, []), expected)
+            self.assertEqual(self.dependents.count(component), len(expected))
+        self.assertEqual(
+            set(self.dependents), {('日', 'kanji'), ('本', 'kanji')})
+
+    def test_find_unlocked(self):
+        path = [self.intern(('本', 'kanji')), self.intern(('日', 'kanji'))]
+        self.assertEqual(
+            self.dependents.find_unlocked(path), {'日本': 1, '日日': 1})
+        self.assertEqual(
+            self.dependents.find_unlocked(path[:1]), {})
+        self.assertEqual(
+            self.dependents.find_unlocked(path[:1], known=path[1:]),
+            {'日本': 0})
+
+    def test_find_unlocked_with_repeated_components(self):
+        day, book = self.intern(('日', 'kanji')), self.intern(('本', 'kanji'))
+        self.assertEqual(
+            self.dependents.find_unlocked([day, day, book]),
+            {'日本': 2, '日日': 1})
+        self.assertEqual(
+            self.dependents.find_unlocked([day, book], known=[book, book]),
+            {'日本': 1, '日日': 0})
+
+    def test_unknown_components_are_not_interned(self):
+        progja.unlocks.load_dependents()
+        size = len(progja.components.table)
+        unknown = ('未知の成分', 'word')
+        self.assertNotIn(unknown, self.dependents)
+        self.assertEqual(self.dependents.count(unknown), 0)
+        self.assertIsNone(self.dependents.get(unknown))
+        with self.assertRaises(KeyError):
+            self.dependents[unknown]
+        # roots are interned, but nothing depends on them
+        self.assertIsNone(self.dependents.get(('日本', 'word')))
+        self.assertEqual(
+            progja.unlocks.find_unlocked(unknown, known=[unknown]),
+            {'kanji': [], 'word': [], 'sentence': []})
+        self.assertEqual(len(progja.components.table), size)
+
+    def test_restored_progressions(self):
+        progressions = pickle.loads(pickle.dumps(self.progressions))
+        dependents = progja.unlocks.Dependents(progressions)
+        self.assertEqual(dict(dependents), dict(self.dependents))
@@ -4,7 +4,22 @@ import progja
 
 class TestWords(unittest.TestCase):
 
-    pass
+    def test_load_columns_matches_load(self):
+        columns = ['Word', 'Reading', 'IsSometimesKana']
+        for common, load in ((True, progja.words.load_common),
+                             (False, progja.words.load)):
+            df = progja.words.load_columns(columns, common=common)
+            self.assertEqual(list(df.columns), columns)
+            self.assertEqual(
+                sorted(zip(*map(df.get, columns))),
+                sorted(zip(*map(load().get, columns))))
+
+    def test_loaders_use_compact_dtypes(self):
+        df = progja.words.load()
+        self.assertEqual(df['PriorityNF'].dtype, 'int8')
+        self.assertEqual(df['Priority'].dtype, 'category')
+        df = progja.words.load_definitions()
+        self.assertEqual(df['PartOfSpeech'].dtype, 'category')
 
 
 class TestWordCompositions(unittest.TestCase):